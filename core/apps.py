@@ -34,6 +34,12 @@ class CoreConfig(AppConfig):
             except Exception:
                 # 若底层SQLite不支持FTS5或迁移阶段，忽略错误
                 pass
+            try:
+                # trigram 子串索引（词条+别名），用于模糊候选检索；需要 SQLite >= 3.34
+                from .fts import ensure_lexicon_fts
+                ensure_lexicon_fts()
+            except Exception:
+                pass
 
         # 仅在迁移完成后确保账号和FTS表存在，避免在 App 启动阶段访问数据库导致报错
         if getattr(settings, 'DEBUG', False):
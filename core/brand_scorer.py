@@ -0,0 +1,107 @@
+"""
+品牌可能性本地预判
+
+品牌词抽取前先在本地给文本打分，只有可能含品牌词（或无法判断）的文本才交给 DeepSeek：
+  - 命中品牌词库（brand 分类自动机）的文本直接判定为需要抽取；
+  - 逐 token 按常见英文词表（core/data/common_words.txt）与字形特征打分：
+    词内大小写混排（iPhone）、全大写、首字母大写的非常见词得分高；
+    常见词、纯数字、数量单位（12oz、4pcs）得分为 0；小写的非常见词介于两者之间；
+  - 含非拉丁字母的 token 无法判断，按需要抽取处理。
+文本得分取各 token 的最大值，低于 BRAND_PREFILTER_THRESHOLD 的文本视为无品牌词，不发起请求。
+"""
+import os
+import re
+import threading
+
+from . import metrics
+
+_WORDS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'common_words.txt')
+_TOKEN_RE = re.compile(r"[^\W_]+(?:[-'&.][^\W_]+)*")
+_NUMBER_RE = re.compile(r"[\d.,'&-]+")
+_QUANTITY_RE = re.compile(r"\d+(?:\.\d+)?([a-z]+)")
+_SUFFIXES = ("'s", 's', 'es', 'ed', 'ing', 'ly', 'er')
+
+
+def load_common_words(path: str = _WORDS_PATH):
+    with open(path, encoding='utf-8') as f:
+        return frozenset(
+            line.strip().lower() for line in f
+            if line.strip() and not line.startswith('#')
+        )
+
+
+class BrandScorer:
+    """按 token 字形与常见词表给文本打品牌可能性分（0~1）。"""
+
+    def __init__(self, common_words):
+        self.words = frozenset(common_words)
+
+    def _is_common(self, word: str) -> bool:
+        if word in self.words:
+            return True
+        for suf in _SUFFIXES:
+            if word.endswith(suf) and len(word) - len(suf) >= 3 and word[:-len(suf)] in self.words:
+                return True
+        parts = re.split(r"[-'&.]", word)
+        return len(parts) > 1 and all(p in self.words or p.isdigit() for p in parts if p)
+
+    def token_score(self, token: str) -> float:
+        if not token.isascii():
+            return 1.0
+        lower = token.lower()
+        if _NUMBER_RE.fullmatch(lower):
+            return 0.0
+        if any(c.isdigit() for c in token):
+            m = _QUANTITY_RE.fullmatch(lower)
+            if m and self._is_common(m.group(1)):
+                return 0.0
+            # 字母数字混排：型号或品牌
+            return 0.5
+        if self._is_common(lower):
+            return 0.0
+        if any(c.isupper() for c in token[1:]) and not token.isupper():
+            return 0.95
+        if token.isupper():
+            return 0.8 if len(token) >= 2 else 0.0
+        if token[0].isupper():
+            return 0.9
+        return 0.5 if len(token) > 2 else 0.2
+
+    def score(self, text: str, automaton=None) -> float:
+        if not text:
+            return 0.0
+        if automaton is not None and automaton.matched_phrases(text):
+            return 1.0
+        best = 0.0
+        for token in _TOKEN_RE.findall(text):
+            best = max(best, self.token_score(token))
+            if best >= 1.0:
+                break
+        return best
+
+
+_SCORER = None
+_SCORER_LOCK = threading.Lock()
+
+
+def get_brand_scorer() -> BrandScorer:
+    global _SCORER
+    if _SCORER is None:
+        with _SCORER_LOCK:
+            if _SCORER is None:
+                _SCORER = BrandScorer(load_common_words())
+    return _SCORER
+
+
+def needs_llm(text: str) -> bool:
+    """文本是否需要调用 LLM 抽取品牌词；关闭预判（BRAND_PREFILTER_ENABLED=False）时总是需要。"""
+    from django.conf import settings
+    if not getattr(settings, 'BRAND_PREFILTER_ENABLED', True):
+        return True
+    from .lexicon import get_category_automaton
+    score = get_brand_scorer().score(text, get_category_automaton('brand'))
+    if score >= float(getattr(settings, 'BRAND_PREFILTER_THRESHOLD', 0.45)):
+        metrics.incr('brand_prefilter.sent')
+        return True
+    metrics.incr('brand_prefilter.skipped')
+    return False
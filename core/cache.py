@@ -0,0 +1,107 @@
+"""
+进程内缓存工具：线程安全的有界 LRU（可选 TTL）及命中统计。
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    def __init__(self, maxsize=10000, ttl=None):
+        self.maxsize = int(maxsize)
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is not _MISSING:
+                value, expires = item
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+class TokenCache:
+    """
+    token 级结果缓存，键为 (token, 请求分类, 词库版本)。
+    请求内字典保证同一请求的一致性；可选的进程级 LRU 在多个请求之间复用。
+    同一请求的多个工作线程共享一个实例。
+    """
+
+    def __init__(self, categories, version, shared: LRUCache = None):
+        self.version = version
+        self._scope = (tuple(sorted(set(categories))), version)
+        self._local = {}
+        self._lock = threading.Lock()
+        self._shared = shared
+        self.hits = 0
+        self.misses = 0
+
+    def get_many(self, tokens):
+        """返回 ({token: value}, [未命中的 token])。"""
+        found = {}
+        missing = []
+        with self._lock:
+            for t in tokens:
+                if t in self._local:
+                    found[t] = self._local[t]
+                    self.hits += 1
+                    continue
+                value = self._shared.get((t, self._scope), _MISSING) if self._shared is not None else _MISSING
+                if value is not _MISSING:
+                    self._local[t] = value
+                    found[t] = value
+                    self.hits += 1
+                else:
+                    missing.append(t)
+                    self.misses += 1
+        return found, missing
+
+    def put(self, token, value, shared=True):
+        """shared=False 时只写请求内字典（如结果来自旧版本词库的索引，不应以当前版本的键跨请求复用）。"""
+        with self._lock:
+            self._local[token] = value
+        if shared and self._shared is not None:
+            self._shared.set((token, self._scope), value)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hits / total, 4) if total else 0.0}
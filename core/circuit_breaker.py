@@ -0,0 +1,137 @@
+"""
+DeepSeek 调用的熔断器与自适应超时
+
+在最近 N 次调用的滑动窗口内统计失败率（异常、超时、429/5xx，以及耗时超过名义超时一定比例的慢调用）：
+  - closed：正常放行；窗口内调用数达到下限且失败率超过阈值时转为 open；
+  - open：直接拒绝（调用方立即走本地降级逻辑），冷却期结束后转为 half_open；
+  - half_open：只放行少量试探调用，成功则恢复 closed，失败则重新 open。
+
+超时随观测延迟调整：按调用方给定的名义超时分组记录成功调用耗时，
+实际超时取 p95 × 系数，并限制在 [最小超时, 名义超时] 之间；样本不足时使用名义超时。
+"""
+import threading
+import time
+from collections import deque
+
+from . import metrics
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _p95(samples):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=50, min_calls=10, error_rate=0.5, open_seconds=30,
+                 half_open_calls=1, slow_call_ratio=0.8, timeout_factor=3.0, min_timeout=1.5):
+        self.name = name
+        self.min_calls = int(min_calls)
+        self.error_rate = float(error_rate)
+        self.open_seconds = float(open_seconds)
+        self.half_open_calls = max(1, int(half_open_calls))
+        self.slow_call_ratio = float(slow_call_ratio)
+        self.timeout_factor = float(timeout_factor)
+        self.min_timeout = float(min_timeout)
+        self._results = deque(maxlen=int(window))
+        self._latency = {}
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self.rejected = 0
+        self.opened = 0
+
+    def allow(self) -> bool:
+        """是否放行本次调用；half_open 时占用一个试探名额。"""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.open_seconds:
+                    self.rejected += 1
+                    return False
+                self._set_state(HALF_OPEN)
+                self._probes = 0
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_calls:
+                    self.rejected += 1
+                    return False
+                self._probes += 1
+            return True
+
+    def record(self, ok: bool, latency: float, nominal_timeout=None):
+        with self._lock:
+            if ok and nominal_timeout is not None:
+                self._latency.setdefault(nominal_timeout, deque(maxlen=200)).append(latency)
+            if ok and nominal_timeout and latency > nominal_timeout * self.slow_call_ratio:
+                ok = False
+            if self.state == HALF_OPEN:
+                if ok:
+                    self._results.clear()
+                    self._set_state(CLOSED)
+                else:
+                    self._open()
+                return
+            self._results.append(ok)
+            if self.state == CLOSED and len(self._results) >= self.min_calls:
+                failures = self._results.count(False)
+                if failures / len(self._results) >= self.error_rate:
+                    self._open()
+
+    def timeout(self, nominal: float) -> float:
+        """按观测延迟给出本次调用的超时（不超过名义超时）。"""
+        with self._lock:
+            samples = self._latency.get(nominal)
+            if not samples or len(samples) < self.min_calls:
+                return nominal
+            return max(self.min_timeout, min(nominal, _p95(samples) * self.timeout_factor))
+
+    def _open(self):
+        self._opened_at = time.monotonic()
+        self.opened += 1
+        self._set_state(OPEN)
+
+    def _set_state(self, state):
+        self.state = state
+        metrics.set_gauge(f'breaker.{self.name}.state', state)
+
+    def stats(self):
+        with self._lock:
+            total = len(self._results)
+            failures = self._results.count(False)
+            return {
+                'state': self.state,
+                'window_calls': total,
+                'error_rate': round(failures / total, 4) if total else 0.0,
+                'p95_seconds': {
+                    str(k): round(_p95(v), 3) for k, v in self._latency.items() if v
+                },
+                'opened': self.opened,
+                'rejected': self.rejected,
+            }
+
+
+_BREAKER = None
+_BREAKER_LOCK = threading.Lock()
+
+
+def get_deepseek_breaker() -> CircuitBreaker:
+    global _BREAKER
+    if _BREAKER is None:
+        with _BREAKER_LOCK:
+            if _BREAKER is None:
+                from django.conf import settings
+                _BREAKER = CircuitBreaker(
+                    'deepseek',
+                    window=getattr(settings, 'DEEPSEEK_BREAKER_WINDOW', 50),
+                    min_calls=getattr(settings, 'DEEPSEEK_BREAKER_MIN_CALLS', 10),
+                    error_rate=getattr(settings, 'DEEPSEEK_BREAKER_ERROR_RATE', 0.5),
+                    open_seconds=getattr(settings, 'DEEPSEEK_BREAKER_OPEN_SECONDS', 30),
+                    half_open_calls=getattr(settings, 'DEEPSEEK_BREAKER_HALF_OPEN_CALLS', 1),
+                    slow_call_ratio=getattr(settings, 'DEEPSEEK_SLOW_CALL_RATIO', 0.8),
+                    timeout_factor=getattr(settings, 'DEEPSEEK_TIMEOUT_P95_FACTOR', 3.0),
+                    min_timeout=getattr(settings, 'DEEPSEEK_MIN_TIMEOUT', 1.5),
+                )
+    return _BREAKER
@@ -0,0 +1,550 @@
+"""
+DeepSeek（OpenAI 兼容接口）调用
+
+清洗接口共用的 LLM 判断逻辑（同义判断、品牌词抽取），结果经 core.llm_cache 缓存。
+每类调用都有同步实现（单条请求）与协程实现（批量清洗经 core.llm_async 并发扇出），
+二者共用同一套提示词构造与结果解析。
+"""
+import json
+import os
+import re
+
+from . import http_client, llm_async, metrics, similarity, single_flight
+from .brand_scorer import needs_llm
+from .llm_cache import get_brand_cache, get_synonym_cache
+from .normalize import normalize
+
+DEEPSEEK_MODEL = 'deepseek-chat'
+
+
+def api_url(path: str) -> str:
+    """DEEPSEEK_BASE_URL 下的接口地址（可指向本地 deepseek_stub 服务做离线压测）。"""
+    from django.conf import settings
+    base = getattr(settings, 'DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
+    return base.rstrip('/') + '/' + path.lstrip('/')
+
+
+def _api_key():
+    return os.getenv('DEEPSEEK_API_KEY', '')
+
+
+def _headers(api_key: str):
+    return {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+
+def _content(jr) -> str:
+    return str(jr.get('choices', [{}])[0].get('message', {}).get('content', '')).strip()
+
+
+def _chat(payload, api_key: str, timeout: float):
+    """同步调用聊天补全，返回回复文本；非 200 返回 None，网络错误抛出异常。相同请求并发时只发出一次。"""
+    url = api_url('chat/completions')
+
+    def call():
+        resp = http_client.post(url, json=payload, headers=_headers(api_key), timeout=timeout)
+        if resp.status_code != 200:
+            return None
+        return _content(resp.json())
+    return single_flight.do(single_flight.flight_key(url, payload), call, timeout=timeout)
+
+
+async def _achat(payload, api_key: str, timeout: float):
+    """_chat 的协程版本。"""
+    url = api_url('chat/completions')
+
+    async def call():
+        resp = await llm_async.post(url, json=payload, headers=_headers(api_key), timeout=timeout)
+        if resp.status_code != 200:
+            return None
+        return _content(resp.json())
+    return await single_flight.ado(single_flight.flight_key(url, payload), call, timeout=timeout)
+
+
+# ---------------- 同义判断 ----------------
+def _synonym_payload(a1: str, b1: str):
+    return {
+        "model": DEEPSEEK_MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a strict synonym/equivalence checker. Reply only 'yes' or 'no'."},
+            {"role": "user", "content": f"Are '{a1}' and '{b1}' synonyms or representing the same brand/company/product? Answer yes or no."}
+        ],
+        "stream": False
+    }
+
+
+def _parse_synonym(content: str) -> bool:
+    content = content.lower()
+    return content.startswith('y') or ('yes' in content)
+
+
+def _synonym_local(a: str, b: str):
+    """
+    不调用 API 的判断：返回 (a1, b1, verdict)。
+    verdict 为 None 表示需要调用 API（已配置密钥且缓存未命中）。
+    """
+    a1 = (a or '').strip().lower()
+    b1 = (b or '').strip().lower()
+    if not a1 or not b1:
+        return a1, b1, False
+    # 先用本地相似度快速过滤，避免无意义调用
+    ratio = similarity.ratio(normalize(a1), normalize(b1), cutoff=0.92)
+    if ratio >= 0.92:
+        return a1, b1, True
+    if not _api_key():
+        return a1, b1, False
+    cached = get_synonym_cache().get(a1, b1, DEEPSEEK_MODEL)
+    if cached is not None:
+        metrics.incr('synonym.cache_hits')
+    return a1, b1, cached
+
+
+def _store_synonym(a1: str, b1: str, content):
+    if content is None:
+        return False
+    verdict = _parse_synonym(content)
+    # 仅缓存 API 明确给出的结论，网络或接口错误不入缓存
+    get_synonym_cache().set(a1, b1, DEEPSEEK_MODEL, verdict)
+    return verdict
+
+
+def _synonym_content(a1: str, b1: str):
+    try:
+        metrics.incr('synonym.api_calls')
+        return _chat(_synonym_payload(a1, b1), _api_key(), timeout=6)
+    except Exception:
+        return None
+
+
+async def _asynonym_content(a1: str, b1: str):
+    try:
+        metrics.incr('synonym.api_calls')
+        return await _achat(_synonym_payload(a1, b1), _api_key(), timeout=6)
+    except Exception:
+        return None
+
+
+def is_synonym(a: str, b: str) -> bool:
+    """判断两个词是否同义/指向同一品牌、公司或产品；未配置密钥时降级为严格相似度判断。"""
+    a1, b1, verdict = _synonym_local(a, b)
+    if verdict is not None:
+        return verdict
+    # 网络或API错误时，不判定为同义
+    return _store_synonym(a1, b1, _synonym_content(a1, b1))
+
+
+# ---------------- 批量同义判断 ----------------
+SYNONYM_BATCH_INSTRUCTION = (
+    "For each numbered pair below, decide whether the two terms are synonyms or represent the same "
+    "brand/company/product. Return strictly JSON: {\"answers\": [\"yes\", \"no\", ...]} "
+    "with exactly one answer per pair, in the same order.\n"
+)
+
+
+def _synonym_batch_payload(pairs):
+    lines = '\n'.join(f"[{i}] '{a1}' | '{b1}'" for i, (a1, b1) in enumerate(pairs))
+    return {
+        "model": DEEPSEEK_MODEL,
+        "messages": [
+            {"role": "system", "content": "You are a strict synonym/equivalence checker. Reply only with JSON."},
+            {"role": "user", "content": SYNONYM_BATCH_INSTRUCTION + lines}
+        ],
+        "stream": False
+    }
+
+
+def _parse_synonym_answers(content: str, size: int):
+    """解析 {"answers": [...]}；条数不符时返回 None（整块兜底），无法识别的单项为 None。"""
+    try:
+        obj = json.loads(_strip_code_fence(content))
+    except Exception:
+        return None
+    answers = obj.get('answers') if isinstance(obj, dict) else obj
+    if not isinstance(answers, list) or len(answers) != size:
+        return None
+    out = []
+    for a in answers:
+        if isinstance(a, bool):
+            out.append(a)
+        elif isinstance(a, str) and a.strip().lower() in ('yes', 'no', 'y', 'n', 'true', 'false'):
+            out.append(a.strip().lower() in ('yes', 'y', 'true'))
+        else:
+            out.append(None)
+    return out
+
+
+def _synonym_batch_content(pairs, timeout):
+    try:
+        metrics.incr('synonym.batch_api_calls')
+        return _chat(_synonym_batch_payload(pairs), _api_key(), timeout=timeout)
+    except Exception:
+        return None
+
+
+async def _asynonym_batch_content(pairs, timeout):
+    try:
+        metrics.incr('synonym.batch_api_calls')
+        return await _achat(_synonym_batch_payload(pairs), _api_key(), timeout=timeout)
+    except Exception:
+        return None
+
+
+def verify_synonyms(pairs, deadline=None):
+    """
+    批量同义判断：pairs 为 (a, b) 列表，返回 {(a, b): bool}，与逐个调用 is_synonym 的结论一致。
+    先做本地判断与查缓存；剩余的去重后按 SYNONYM_BATCH_MAX_PAIRS 分块，每块一次请求（JSON yes/no 列表），
+    解析失败的条目再逐对请求兜底；deadline 为 LLM 阶段的绝对截止时刻（llm_async.deadline_after），
+    批量与兜底两轮共用，截止后不再发起兜底请求，未得到结论的条目按不同义处理。
+    """
+    from django.conf import settings
+
+    result = {}
+    asks = {}
+    for a, b in dict.fromkeys(pairs):
+        a1, b1, verdict = _synonym_local(a, b)
+        if verdict is None:
+            asks.setdefault((a1, b1), []).append((a, b))
+        else:
+            result[(a, b)] = verdict
+    if not asks:
+        return result
+
+    if deadline is None:
+        deadline = llm_async.deadline_after()
+    verdicts = {}
+    pending = list(asks)
+    max_pairs = int(getattr(settings, 'SYNONYM_BATCH_MAX_PAIRS', 50))
+    if max_pairs > 1 and len(pending) > 1:
+        timeout = float(getattr(settings, 'SYNONYM_BATCH_TIMEOUT', 20))
+        chunks = [pending[i:i + max_pairs] for i in range(0, len(pending), max_pairs)]
+        # 协程中只做网络请求，缓存读写（数据库）留在调用线程
+        contents = llm_async.fan_out(
+            lambda c: _asynonym_batch_content(c, timeout),
+            lambda c: _synonym_batch_content(c, timeout),
+            chunks,
+            deadline=deadline,
+        )
+        for chunk, content in zip(chunks, contents):
+            answers = _parse_synonym_answers(content, len(chunk)) if content is not None else None
+            for pair, verdict in zip(chunk, answers or ()):
+                if verdict is not None:
+                    get_synonym_cache().set(pair[0], pair[1], DEEPSEEK_MODEL, verdict)
+                    verdicts[pair] = verdict
+        pending = [pair for pair in pending if pair not in verdicts]
+        metrics.incr('synonym.batch_fallbacks', len(pending))
+
+    if pending and llm_async.expired(deadline):
+        metrics.incr('synonym.deadline_skipped', len(pending))
+    elif pending:
+        contents = llm_async.fan_out(
+            lambda pair: _asynonym_content(*pair),
+            lambda pair: _synonym_content(*pair),
+            pending,
+            deadline=deadline,
+        )
+        for pair, content in zip(pending, contents):
+            verdicts[pair] = _store_synonym(pair[0], pair[1], content)
+
+    for pair, originals in asks.items():
+        for original in originals:
+            result[original] = verdicts.get(pair, False)
+    return result
+
+
+def first_synonym_hits(token_phrases, deadline=None):
+    """
+    token_phrases: {token: [候选词, ...]}（按优先级排序）。
+    返回 {token: 第一个同义的候选或 None}，与逐个调用 is_synonym 结果相同；
+    全部 token 的全部候选先汇总去重，经 verify_synonyms 一次（或少数几次）批量判断后再逐 token 取结果。
+    """
+    verdicts = verify_synonyms(
+        [(tk, phrase) for tk, phrases in token_phrases.items() for phrase in phrases], deadline=deadline,
+    )
+    return {
+        tk: next((phrase for phrase in phrases if verdicts.get((tk, phrase))), None)
+        for tk, phrases in token_phrases.items()
+    }
+
+
+# ---------------- 品牌词抽取 ----------------
+# 修改提示词时同步递增 version，旧缓存随之失效
+BRAND_PROMPTS = {
+    # clean_multi：详细规则
+    'full': {
+        'version': 'full-v1',
+        'system': "你是一个严格的品牌词抽取器。必须100%确认是品牌词才能提取，宁可漏判不可误判。，返回JSON数组。",
+        'instruction': (
+            "请从下面文本中找出品牌词，规则：\n"
+            "1) 排除规则（以下情况绝对不是品牌词）：\n"
+            "   - 通用产品名称（如 knife, tool, drill, machine 等）\n"
+            "   - 产品特性描述（如 rainbow, cute, small, legal 等）\n"
+            "   - 产品用途描述（如 self defense, camping, EDC 等）\n"
+            "   - 含数字的型号代码（如 6655 R）\n"
+            "   - 目标人群（如 women, womens）\n"
+            "   - 节日/场合（如 birthday, gifts）\n"
+            "\n"
+            "2) 品牌词特征（符合1个及以上即可判断为品牌词）：\n"
+            "   - 专有名词，不是普通英文单词\n"
+            "   - 在商业语境中常作为品牌或卖家名出现\n"
+            "   - 无法自然直译成中文\n"
+            "   - 不包含产品功能描述\n"
+            "   - 一般首字母大写的单词或全部大写的单词\n"
+            "   - 拼写看似不规范，或不是常见英文词汇\n"
+            "\n"
+            "3) 判断标准：\n"
+            "   - 如果一个词既不是常见英文单词，又不是常见产品通用词，那么优先作为品牌词保留\n"
+            "   - 即使不是国际知名品牌，也要提取出来（例如小众品牌、店铺品牌）\n"
+            "   - 如果完全无法判断，可以标注为【可能是品牌词】并输出\n"
+            "4) 输出格式：严格返回JSON：{\"brands\": [\"brand1\", \"brand2\"]}，如果没有品牌词就返回空数组"
+        ),
+        # 非 JSON 回复的宽松解析分隔符
+        'split': r"[,]",
+    },
+    # clean_multi/batch：精简规则
+    'compact': {
+        'version': 'compact-v1',
+        'system': "你是一个严格的品牌词抽取器。必须100%确认是品牌词才能提取，宁可漏判不可误判。返回JSON数组。",
+        'instruction': (
+            "请从下面文本中找出品牌词，严格排除通用产品词/功能词/型号/节日等。"
+            "输出格式：{\"brands\": [\"brand1\", \"brand2\"]}。"
+        ),
+        'split': r"[,\n]",
+    },
+}
+
+
+def _is_mostly_digits(s: str):
+    digits = sum(ch.isdigit() for ch in s)
+    return digits >= max(3, len(s) * 0.6)
+
+
+def _parse_brands(content: str, split_pattern: str):
+    brands = []
+    try:
+        obj = json.loads(content)
+        if isinstance(obj, dict) and isinstance(obj.get('brands'), list):
+            brands = [str(x).strip() for x in obj.get('brands') if str(x).strip()]
+        elif isinstance(obj, list):
+            brands = [str(x).strip() for x in obj if str(x).strip()]
+    except Exception:
+        # 宽松解析：按分隔符切分
+        brands = [p.strip() for p in re.split(split_pattern, content) if p.strip()]
+    # 过滤掉全数字/主要为数字的项
+    return [b for b in brands if len(b) >= 2 and not _is_mostly_digits(b)]
+
+
+def _brand_payload(full_text: str, prompt):
+    return {
+        "model": DEEPSEEK_MODEL,
+        "messages": [
+            {"role": "system", "content": prompt['system']},
+            {"role": "user", "content": prompt['instruction'] + f"文本：{full_text}"}
+        ],
+        "stream": False
+    }
+
+
+def _request_brands(full_text: str, prompt, api_key: str):
+    """调用 API 抽取品牌词；网络或接口错误返回 None（不缓存）。"""
+    try:
+        metrics.incr('brands.api_calls')
+        content = _chat(_brand_payload(full_text, prompt), api_key, timeout=8)
+        return None if content is None else _parse_brands(content, prompt['split'])
+    except Exception:
+        return None
+
+
+async def _arequest_brands(full_text: str, prompt, api_key: str):
+    try:
+        metrics.incr('brands.api_calls')
+        content = await _achat(_brand_payload(full_text, prompt), api_key, timeout=8)
+        return None if content is None else _parse_brands(content, prompt['split'])
+    except Exception:
+        return None
+
+
+def extract_brands(full_text: str, prompt: str = 'full'):
+    """从整段文本中抽取品牌词列表；相同文本（忽略大小写与空白差异）直接返回缓存结果。"""
+    api_key = _api_key()
+    if not api_key or not (full_text or '').strip():
+        return []
+    if not needs_llm(full_text):
+        return []
+    spec = BRAND_PROMPTS[prompt]
+    cache = get_brand_cache()
+    cached = cache.get(full_text, spec['version'])
+    if cached is not None:
+        metrics.incr('brands.cache_hits')
+        return cached
+    brands = _request_brands(full_text, spec, api_key)
+    if brands is None:
+        return []
+    cache.set(full_text, spec['version'], brands)
+    return brands
+
+
+# ---------------- 多文本批量品牌词抽取 ----------------
+BRAND_BATCH_INSTRUCTION = (
+    "下面是编号的多条文本，请分别找出每条文本中的品牌词，严格排除通用产品词/功能词/型号/节日等。"
+    "输出格式：严格返回JSON：{\"results\": [{\"index\": 0, \"brands\": [\"brand1\", \"brand2\"]}]}，"
+    "每条文本对应一个元素，index 与文本编号一致，没有品牌词则 brands 为空数组。\n"
+)
+# 批量提示词版本：修改 BRAND_BATCH_INSTRUCTION 时递增，使批量抽取的缓存失效；
+# 缓存键为 "<单条提示词版本>/<批量提示词版本>"（批量请求同时使用单条提示词的 system）
+BRAND_BATCH_VERSION = 'batch-v1'
+
+
+def _estimate_tokens(text: str) -> int:
+    # 粗略估算（中英混排按 3 字符/token），另加编号与 JSON 输出的开销
+    return len(text) // 3 + 12
+
+
+def _chunk_by_budget(texts, token_budget: int, max_items: int):
+    chunk, used = [], 0
+    for t in texts:
+        cost = _estimate_tokens(t)
+        if chunk and (used + cost > token_budget or len(chunk) >= max_items):
+            yield chunk
+            chunk, used = [], 0
+        chunk.append(t)
+        used += cost
+    if chunk:
+        yield chunk
+
+
+def _strip_code_fence(content: str) -> str:
+    content = content.strip()
+    if content.startswith('```'):
+        content = content.split('\n', 1)[1] if '\n' in content else ''
+        if content.rstrip().endswith('```'):
+            content = content.rstrip()[:-3]
+    return content.strip()
+
+
+def _parse_indexed_brands(content: str, chunk):
+    """解析 {"results": [{"index", "brands"}]}，只返回校验通过的条目 {index: brands}。"""
+    try:
+        obj = json.loads(_strip_code_fence(content))
+    except Exception:
+        return {}
+    items = obj.get('results') if isinstance(obj, dict) else obj
+    if not isinstance(items, list):
+        return {}
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict) or not isinstance(item.get('brands'), list):
+            continue
+        idx = item.get('index')
+        if isinstance(idx, str) and idx.strip().isdigit():
+            idx = int(idx)
+        if not isinstance(idx, int) or isinstance(idx, bool) or not 0 <= idx < len(chunk) or idx in parsed:
+            continue
+        brands = [str(x).strip() for x in item['brands'] if str(x).strip()]
+        brands = [b for b in brands if len(b) >= 2 and not _is_mostly_digits(b)]
+        # 品牌词必须出现在对应文本中，否则视为编号错位，交由单条调用兜底
+        lower = chunk[idx].lower()
+        if any(b.lower() not in lower for b in brands):
+            continue
+        parsed[idx] = brands
+    return parsed
+
+
+def _brand_batch_payload(chunk, prompt):
+    numbered = '\n'.join(f"[{i}] {' '.join(t.split())}" for i, t in enumerate(chunk))
+    return {
+        "model": DEEPSEEK_MODEL,
+        "messages": [
+            {"role": "system", "content": prompt['system']},
+            {"role": "user", "content": BRAND_BATCH_INSTRUCTION + numbered}
+        ],
+        "stream": False
+    }
+
+
+def _request_brands_batch(chunk, prompt, api_key: str, timeout: float):
+    """一次请求抽取多条文本的品牌词，返回 {chunk 下标: brands}；失败的条目不出现在结果中。"""
+    try:
+        metrics.incr('brands.batch_api_calls')
+        content = _chat(_brand_batch_payload(chunk, prompt), api_key, timeout=timeout)
+        return {} if content is None else _parse_indexed_brands(content, chunk)
+    except Exception:
+        return {}
+
+
+async def _arequest_brands_batch(chunk, prompt, api_key: str, timeout: float):
+    try:
+        metrics.incr('brands.batch_api_calls')
+        content = await _achat(_brand_batch_payload(chunk, prompt), api_key, timeout=timeout)
+        return {} if content is None else _parse_indexed_brands(content, chunk)
+    except Exception:
+        return {}
+
+
+def extract_brands_many(texts, prompt: str = 'compact', deadline=None):
+    """
+    批量抽取品牌词，返回 {text: brands}。
+    本地预判无品牌词的文本直接返回空列表；其余先查缓存（批量与单条提示词的结果按各自版本缓存），
+    未命中的文本按 token 预算分块，每块一次请求（编号 JSON 输出），
+    解析或校验失败的条目再逐条调用 extract_brands 兜底；deadline 含义同 verify_synonyms，截止后未完成的文本品牌词为空。
+    """
+    from django.conf import settings
+
+    texts = list(dict.fromkeys(t for t in texts if isinstance(t, str) and t.strip()))
+    api_key = _api_key()
+    if not api_key or not texts:
+        return {t: [] for t in texts}
+    spec = BRAND_PROMPTS[prompt]
+    batch_version = f"{spec['version']}/{BRAND_BATCH_VERSION}"
+    cache = get_brand_cache()
+    result = {}
+    pending = []
+    for t in texts:
+        if not needs_llm(t):
+            result[t] = []
+            continue
+        # 批量提示词与单条提示词（兜底）的结果分别缓存，两者均可复用
+        cached = cache.get(t, batch_version)
+        if cached is None:
+            cached = cache.get(t, spec['version'])
+        if cached is None:
+            pending.append(t)
+        else:
+            metrics.incr('brands.cache_hits')
+            result[t] = cached
+
+    if deadline is None:
+        deadline = llm_async.deadline_after()
+    token_budget = int(getattr(settings, 'BRAND_BATCH_TOKEN_BUDGET', 2000))
+    if token_budget > 0 and len(pending) > 1:
+        chunks = list(_chunk_by_budget(
+            pending, token_budget, int(getattr(settings, 'BRAND_BATCH_MAX_ITEMS', 50))
+        ))
+        timeout = float(getattr(settings, 'BRAND_BATCH_TIMEOUT', 30))
+        parsed_chunks = llm_async.fan_out(
+            lambda c: _arequest_brands_batch(c, spec, api_key, timeout),
+            lambda c: _request_brands_batch(c, spec, api_key, timeout),
+            chunks,
+            deadline=deadline,
+        )
+        for chunk, parsed in zip(chunks, parsed_chunks):
+            parsed = parsed or {}
+            for idx, brands in parsed.items():
+                cache.set(chunk[idx], batch_version, brands)
+                result[chunk[idx]] = brands
+            metrics.incr('brands.batch_fallbacks', len(chunk) - len(parsed))
+
+    missing = [t for t in pending if t not in result]
+    if missing and llm_async.expired(deadline):
+        metrics.incr('brands.deadline_skipped', len(missing))
+        result.update((t, []) for t in missing)
+    elif missing:
+        fallback = llm_async.fan_out(
+            lambda t: _arequest_brands(t, spec, api_key),
+            lambda t: _request_brands(t, spec, api_key),
+            missing,
+            deadline=deadline,
+        )
+        for t, brands in zip(missing, fallback):
+            if brands is not None:
+                cache.set(t, spec['version'], brands)
+            result[t] = brands or []
+    return result
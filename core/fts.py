@@ -0,0 +1,191 @@
+"""
+词库候选检索：SQLite FTS5 trigram 全文索引
+
+lexicon_fts 同时收录启用词条及其别名（附带分类名与词条 id），trigram 分词器支持任意子串检索，
+clean_text_multi 系列接口对一段文本的全部 token 只需查询一次，取代逐 token 的 icontains 全表扫描。
+检索列 norm 存放 core.normalize 规范化后的文本，term 保留原文。
+"""
+import functools
+import logging
+from collections import defaultdict
+
+from django.db import connection
+
+from .lexicon import LexiconEntry
+from .normalize import normalize
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'lexicon_fts'
+
+# rowid 编码：词条为 2*id，别名为 2*id+1，保证两类记录互不冲突
+def _word_rowid(word_id):
+    return word_id * 2
+
+
+def _alias_rowid(alias_id):
+    return alias_id * 2 + 1
+
+
+def _best_effort(fn):
+    """索引同步失败（如 SQLite 不支持 trigram、迁移阶段表不存在）不影响词库写入本身。"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            logger.warning('%s 同步 lexicon_fts 失败', fn.__name__, exc_info=True)
+            return None
+    return wrapper
+
+
+def ensure_lexicon_fts():
+    """创建 trigram 索引表（如不存在或结构过旧则重建），新建时从词库全量填充。"""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE])
+        exists = cursor.fetchone() is not None
+        if exists:
+            cursor.execute(f"PRAGMA table_info({FTS_TABLE})")
+            if 'norm' not in {row[1] for row in cursor.fetchall()}:
+                cursor.execute(f"DROP TABLE {FTS_TABLE}")
+                exists = False
+        if not exists:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+                "norm, term UNINDEXED, word UNINDEXED, category UNINDEXED, word_id UNINDEXED, is_alias UNINDEXED, "
+                "tokenize = 'trigram')"
+            )
+    if not exists:
+        rebuild_lexicon_fts()
+
+
+def rebuild_lexicon_fts():
+    from .models import Word, WordAlias
+    rows = []
+    words = {}
+    for wid, word, cat in Word.objects.filter(is_active=True).values_list('id', 'word', 'category__name'):
+        words[wid] = (word, cat or 'unknown')
+        if (word or '').strip():
+            rows.append((_word_rowid(wid), normalize(word), word.strip(), word, cat or 'unknown', wid, 0))
+    for aid, wid, alias in WordAlias.objects.values_list('id', 'word_id', 'alias'):
+        if wid in words and (alias or '').strip():
+            word, cat = words[wid]
+            rows.append((_alias_rowid(aid), normalize(alias), alias.strip(), word, cat, wid, 1))
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE}(rowid, norm, term, word, category, word_id, is_alias) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+    return len(rows)
+
+
+@_best_effort
+def sync_word(word):
+    """词条保存后：重写该词条及其全部别名的索引行（分类、启用状态可能已变化）。"""
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE word_id = %s", [word.id])
+        if not word.is_active:
+            return
+        cat = word.category.name if word.category_id else 'unknown'
+        rows = []
+        if (word.word or '').strip():
+            rows.append((_word_rowid(word.id), normalize(word.word), word.word.strip(), word.word, cat, word.id, 0))
+        for aid, alias in word.aliases.values_list('id', 'alias'):
+            if (alias or '').strip():
+                rows.append((_alias_rowid(aid), normalize(alias), alias.strip(), word.word, cat, word.id, 1))
+        cursor.executemany(
+            f"INSERT INTO {FTS_TABLE}(rowid, norm, term, word, category, word_id, is_alias) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            rows,
+        )
+
+
+@_best_effort
+def delete_word(word_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE word_id = %s", [word_id])
+
+
+@_best_effort
+def sync_alias(alias):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [_alias_rowid(alias.id)])
+        word = alias.word
+        if not word.is_active or not (alias.alias or '').strip():
+            return
+        cat = word.category.name if word.category_id else 'unknown'
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}(rowid, norm, term, word, category, word_id, is_alias) VALUES (%s, %s, %s, %s, %s, %s, %s)",
+            [_alias_rowid(alias.id), normalize(alias.alias), alias.alias.strip(), word.word, cat, word.id, 1],
+        )
+
+
+@_best_effort
+def delete_alias(alias_id):
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [_alias_rowid(alias_id)])
+
+
+@_best_effort
+def sync_category(category):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {FTS_TABLE} SET category = %s WHERE word_id IN (SELECT id FROM core_word WHERE category_id = %s)",
+            [category.name, category.id],
+        )
+
+
+def _quote(token: str) -> str:
+    return '"' + token.replace('"', '""') + '"'
+
+
+def lookup_candidates(tokens, categories, per_kind_limit=300):
+    """
+    取回每个 token 的子串候选，返回 {token: [LexiconEntry]}（每个 token 每个分类的词条、别名各至多 per_kind_limit 条，按 rowid 取前若干条）。
+    每个规范化 token 一条查询，分类过滤与按 (分类, 词条/别名) 截断都在 SQL 中完成（窗口函数 row_number），
+    不再把所有 token 的命中行取回后在 Python 中逐 token 过滤。
+    索引不可用时返回 None，由调用方回退到内存快照。
+    """
+    tokens = sorted(set(t for t in tokens if t))
+    cats = sorted(set((c or '').lower() for c in categories if c))
+    result = {t: [] for t in tokens}
+    if not tokens or not cats:
+        return result
+    by_norm = defaultdict(list)
+    for t in tokens:
+        n = normalize(t)
+        if n:
+            by_norm[n].append(t)
+    # trigram 仅能对 >=3 个字符的 token 走 MATCH；更短的 token 使用 LIKE（同样由 trigram 表承载）
+    match_sql = _bounded_query(f"{FTS_TABLE} MATCH %s", len(cats))
+    like_sql = _bounded_query("norm LIKE %s", len(cats))
+    try:
+        with connection.cursor() as cursor:
+            for n, owners in by_norm.items():
+                if len(n) >= 3:
+                    cursor.execute(match_sql, ['norm : ' + _quote(n), *cats, per_kind_limit])
+                else:
+                    cursor.execute(like_sql, [f'%{n}%', *cats, per_kind_limit])
+                entries = [
+                    LexiconEntry(term, term.lower(), norm, word_id, word, cat, bool(is_alias))
+                    for norm, term, word, cat, word_id, is_alias in cursor.fetchall()
+                ]
+                for t in owners:
+                    result[t] = list(entries)
+    except Exception:
+        logger.warning('lexicon_fts 查询失败，回退到内存快照', exc_info=True)
+        return None
+    return result
+
+
+@functools.lru_cache(maxsize=16)
+def _bounded_query(condition: str, n_cats: int) -> str:
+    """满足 condition 的行中，每个 (分类, 词条/别名) 按 rowid 取至多 LIMIT 条，结果按 rowid 排序。"""
+    cat_marks = ', '.join(['%s'] * n_cats)
+    return (
+        "SELECT norm, term, word, category, word_id, is_alias FROM ("
+        "SELECT rowid, norm, term, word, category, word_id, is_alias, "
+        "row_number() OVER (PARTITION BY lower(category), is_alias ORDER BY rowid) AS rn "
+        f"FROM {FTS_TABLE} WHERE {condition} AND lower(category) IN ({cat_marks})"
+        ") WHERE rn <= %s ORDER BY rowid"
+    )
@@ -0,0 +1,108 @@
+"""
+WordLog 命中记录的写后缓冲
+
+analyze_text 命中词条时不再逐条同步写库，而是放入进程内缓冲区，
+由后台线程在达到条数阈值或时间阈值时通过 bulk_create 批量写入；进程退出时自动落盘。
+"""
+import atexit
+import logging
+import random
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WordLogBuffer:
+    def __init__(self, max_size=200, flush_interval=2.0, sample_rate=1.0, max_pending=None):
+        self.max_size = max(1, int(max_size))
+        self.flush_interval = max(0.1, float(flush_interval))
+        self.sample_rate = min(1.0, max(0.0, float(sample_rate)))
+        # 数据库不可写时的积压上限，超出后丢弃最旧记录，避免内存无限增长
+        self.max_pending = int(max_pending or self.max_size * 50)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def add(self, word_ids, context: str):
+        """记录一次分析请求命中的词条 id；按 sample_rate 对整次请求采样。"""
+        if not word_ids or self._stopped:
+            return
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return
+        with self._lock:
+            self._pending.extend((wid, context) for wid in word_ids)
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                del self._pending[:overflow]
+            full = len(self._pending) >= self.max_size
+        self._ensure_thread()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        """将缓冲区全部写入数据库，返回写入条数。"""
+        from django.db import close_old_connections
+        from .models import Word, WordLog
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+            if not batch:
+                return 0
+            try:
+                # 缓冲期间词条可能已被删除，写入前过滤，避免外键错误导致整批失败
+                alive = set(Word.objects.filter(id__in={wid for wid, _ in batch}).values_list('id', flat=True))
+                logs = [WordLog(word_id=wid, context=ctx) for wid, ctx in batch if wid in alive]
+                WordLog.objects.bulk_create(logs, batch_size=500)
+                return len(logs)
+            except Exception:
+                logger.exception('WordLog 批量写入失败，丢弃 %d 条记录', len(batch))
+                return 0
+            finally:
+                if threading.current_thread() is self._thread:
+                    close_old_connections()
+
+    def close(self):
+        self._stopped = True
+        self._wakeup.set()
+        self.flush()
+
+    def _ensure_thread(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='wordlog-flusher', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+
+_BUFFER = None
+_BUFFER_LOCK = threading.Lock()
+
+
+def get_wordlog_buffer() -> WordLogBuffer:
+    global _BUFFER
+    if _BUFFER is None:
+        with _BUFFER_LOCK:
+            if _BUFFER is None:
+                from django.conf import settings
+                _BUFFER = WordLogBuffer(
+                    max_size=getattr(settings, 'WORDLOG_BUFFER_SIZE', 200),
+                    flush_interval=getattr(settings, 'WORDLOG_FLUSH_SECONDS', 2.0),
+                    sample_rate=getattr(settings, 'WORDLOG_SAMPLE_RATE', 1.0),
+                )
+                atexit.register(_BUFFER.close)
+    return _BUFFER
+
+
+def log_word_hits(word_ids, context: str):
+    get_wordlog_buffer().add(list(word_ids), context)
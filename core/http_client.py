@@ -0,0 +1,90 @@
+"""
+DeepSeek 出站请求共用的 HTTP 客户端
+
+进程内共享一个 requests.Session：HTTPAdapter 连接池保持长连接，避免每次调用重新进行
+DNS、TCP 与 TLS 握手；按配置对连接错误与 429/5xx 做指数退避重试（读取超时不重试）。
+Session 不保存 cookie，仅复用连接池（urllib3 连接池线程安全），可在批量清洗的工作线程间共享。
+请求经 core.circuit_breaker 熔断：熔断打开时不发出请求，直接抛出 CircuitOpenError。
+"""
+import threading
+import time
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .circuit_breaker import get_deepseek_breaker
+
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """熔断打开，请求未发出；调用方按请求失败处理，走本地降级逻辑。"""
+
+
+def is_failure_status(status_code: int) -> bool:
+    return status_code == 429 or status_code >= 500
+
+
+def _build_session():
+    from django.conf import settings
+    retry = Retry(
+        total=int(getattr(settings, 'DEEPSEEK_HTTP_RETRIES', 2)),
+        connect=int(getattr(settings, 'DEEPSEEK_HTTP_RETRIES', 2)),
+        # 读取超时不重试，否则单次调用耗时会成倍超出名义超时
+        read=False,
+        backoff_factor=float(getattr(settings, 'DEEPSEEK_HTTP_BACKOFF', 0.3)),
+        status_forcelist=(429, 500, 502, 503, 504),
+        # 聊天补全请求无副作用，POST 同样允许重试
+        allowed_methods=frozenset({'GET', 'POST'}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    pool_size = int(getattr(settings, 'DEEPSEEK_HTTP_POOL_SIZE', 16))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry, pool_block=False)
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session() -> requests.Session:
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                _SESSION = _build_session()
+    return _SESSION
+
+
+def reset_session():
+    """丢弃当前连接池（配置变更或 fork 后调用），下次请求时重建。"""
+    global _SESSION
+    with _SESSION_LOCK:
+        session, _SESSION = _SESSION, None
+    if session is not None:
+        session.close()
+
+
+def post(url: str, *, json=None, headers=None, timeout=10):
+    """
+    POST 请求；timeout 为名义读取超时（秒），实际超时由熔断器按观测延迟下调，
+    连接超时取 DEEPSEEK_CONNECT_TIMEOUT。
+    """
+    from django.conf import settings
+    breaker = get_deepseek_breaker()
+    if not breaker.allow():
+        raise CircuitOpenError(f'circuit open: {url}')
+    read_timeout = breaker.timeout(timeout)
+    connect_timeout = float(getattr(settings, 'DEEPSEEK_CONNECT_TIMEOUT', 3.05))
+    started = time.monotonic()
+    ok = False
+    try:
+        resp = get_session().post(url, json=json, headers=headers, timeout=(min(connect_timeout, read_timeout), read_timeout))
+        ok = not is_failure_status(resp.status_code)
+        return resp
+    finally:
+        breaker.record(ok, time.monotonic() - started, timeout)
@@ -0,0 +1,166 @@
+"""
+大批量清洗的后台任务（SQLite 任务队列，无需外部消息中间件）
+
+  - submit_job：输入逐条写入 CleanJobItem，任务状态为 queued；
+  - claim_job：工作进程以条件 UPDATE 抢占 queued 任务，或接管心跳超过 CLEAN_JOB_LEASE_SECONDS 的 running 任务
+    （持有进程崩溃或被强制结束）；
+  - run_job：按 CLEAN_JOB_CHUNK_SIZE 分块复用批量清洗管线（块内去重、LLM 批量阶段、进程级线程池），
+    每块结果与检查点（processed）在同一事务中写回，重启后从检查点继续，已完成的块不会重复处理；
+    执行出错时放回队列从检查点重试，连续失败 CLEAN_JOB_MAX_ATTEMPTS 次后标记为 failed。
+进度与吞吐（已处理条数 / 累计执行耗时）由 job_progress 计算，供状态接口与 clean_worker 输出。
+"""
+import logging
+import os
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# 工作进程标识：进程内唯一
+WORKER_ID = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+
+
+class JobLeaseLost(Exception):
+    """任务已被其他工作进程接管（本进程心跳超时），停止处理且不写回结果。"""
+
+
+def _setting(name, default):
+    from django.conf import settings
+    return getattr(settings, name, default)
+
+
+def submit_job(texts, categories=None, hotwords=''):
+    from .models import CleanJob, CleanJobItem
+    with transaction.atomic():
+        job = CleanJob.objects.create(
+            categories=list(categories or []), hotwords=hotwords or '', total=len(texts),
+        )
+        CleanJobItem.objects.bulk_create(
+            # 非字符串输入存为 NULL，清洗结果为空字符串，与 clean_multi/batch 一致
+            (CleanJobItem(job=job, index=i, original=t if isinstance(t, str) else None)
+             for i, t in enumerate(texts)),
+            batch_size=2000,
+        )
+    metrics.incr('jobs.submitted')
+    return job
+
+
+def claim_job(worker_id: str = WORKER_ID):
+    """抢占一个待执行任务（按提交顺序）；无可执行任务时返回 None。"""
+    from .models import CleanJob
+    now = timezone.now()
+    stale = now - timedelta(seconds=float(_setting('CLEAN_JOB_LEASE_SECONDS', 300)))
+    candidates = CleanJob.objects.filter(
+        Q(status='queued') | Q(status='running', heartbeat_at__lt=stale)
+    ).order_by('created_at', 'id').values_list('id', 'status', 'heartbeat_at')[:20]
+    for job_id, status, heartbeat_at in candidates:
+        # 条件 UPDATE 作为 CAS：只有状态与心跳都未被他人改动时才能抢到
+        rows = CleanJob.objects.filter(pk=job_id, status=status)
+        rows = rows.filter(heartbeat_at=heartbeat_at) if heartbeat_at else rows.filter(heartbeat_at__isnull=True)
+        if rows.update(status='running', worker=worker_id, heartbeat_at=now):
+            CleanJob.objects.filter(pk=job_id, started_at__isnull=True).update(started_at=now)
+            if status == 'running':
+                metrics.incr('jobs.reclaimed')
+            return CleanJob.objects.get(pk=job_id)
+    return None
+
+
+def release_job(job, worker_id: str = WORKER_ID):
+    """主动停止时把任务放回队列，其他工作进程可立即从检查点继续。"""
+    from .models import CleanJob
+    CleanJob.objects.filter(pk=job.pk, worker=worker_id, status='running').update(
+        status='queued', worker='', heartbeat_at=None,
+    )
+
+
+def job_progress(job):
+    throughput = job.processed / job.elapsed_seconds if job.elapsed_seconds > 0 else 0.0
+    remaining = job.total - job.processed
+    return {
+        'processed': job.processed,
+        'total': job.total,
+        'percent': round(job.processed * 100.0 / job.total, 2) if job.total else 100.0,
+        'throughput_per_second': round(throughput, 2),
+        'eta_seconds': round(remaining / throughput, 1) if throughput and remaining else None,
+    }
+
+
+def run_job(job, worker_id: str = WORKER_ID, chunk_size=None, parallelism=None, on_progress=None, should_stop=None):
+    """
+    从检查点开始执行任务直到完成；should_stop() 为真时在块边界返回 False（任务保持 running，由调用方释放）。
+    执行出错时（如 SQLite “database is locked”）任务放回队列、从检查点重试，未推进检查点的连续失败
+    达到 CLEAN_JOB_MAX_ATTEMPTS 次后标记为 failed；两种情况都会重新抛出异常，job.status 为更新后的状态。
+    """
+    from .models import CleanJob, CleanJobItem
+    from .views import _batch_options, _build_batch_cleaner, _dedup_texts
+    from .worker_pool import get_batch_pool
+
+    chunk_size = int(chunk_size or _setting('CLEAN_JOB_CHUNK_SIZE', 500))
+    parallelism = int(parallelism or _setting('CLEAN_JOB_PARALLELISM', _setting('BATCH_POOL_WORKERS', 8)))
+    req_categories, hotword_list = _batch_options({'categories': job.categories, 'hotwords': job.hotwords})
+    pool = get_batch_pool()
+    try:
+        while True:
+            if should_stop is not None and should_stop():
+                return False
+            items = list(
+                CleanJobItem.objects.filter(job_id=job.pk, index__gte=job.processed)
+                .order_by('index').values_list('id', 'index', 'original')[:chunk_size]
+            )
+            if not items:
+                break
+            started = time.monotonic()
+            dedup_keys, distinct = _dedup_texts([original for _, _, original in items])
+            unique_texts = list(distinct.values())
+            process_one, _ = _build_batch_cleaner(unique_texts, req_categories, hotword_list)
+            cleaned_by_key = dict(zip(distinct, pool.map(process_one, unique_texts, limit=parallelism)))
+            rows = [
+                CleanJobItem(id=item_id, cleaned=cleaned_by_key[key] or '')
+                for (item_id, _, _), key in zip(items, dedup_keys)
+            ]
+            elapsed = time.monotonic() - started
+            checkpoint = items[-1][1] + 1
+            with transaction.atomic():
+                owned = CleanJob.objects.filter(pk=job.pk, worker=worker_id, status='running').update(
+                    processed=checkpoint, heartbeat_at=timezone.now(), attempts=0,
+                    elapsed_seconds=F('elapsed_seconds') + elapsed,
+                )
+                if not owned:
+                    raise JobLeaseLost(f'job {job.pk} was taken over by another worker')
+                CleanJobItem.objects.bulk_update(rows, ['cleaned'], batch_size=500)
+            job.processed = checkpoint
+            job.attempts = 0
+            job.elapsed_seconds += elapsed
+            metrics.incr('jobs.items_processed', len(items))
+            if on_progress is not None:
+                on_progress(job)
+    except JobLeaseLost:
+        raise
+    except Exception as e:
+        logger.exception('清洗任务 #%s 执行失败', job.pk)
+        job.attempts += 1
+        if job.attempts < int(_setting('CLEAN_JOB_MAX_ATTEMPTS', 3)):
+            # 检查点之前的结果已提交，放回队列后从检查点继续
+            job.status = 'queued'
+            CleanJob.objects.filter(pk=job.pk, worker=worker_id).update(
+                status='queued', worker='', heartbeat_at=None, attempts=job.attempts, error=str(e)[:2000],
+            )
+            metrics.incr('jobs.retried')
+        else:
+            job.status = 'failed'
+            CleanJob.objects.filter(pk=job.pk, worker=worker_id).update(
+                status='failed', attempts=job.attempts, error=str(e)[:2000], finished_at=timezone.now(),
+            )
+            metrics.incr('jobs.failed')
+        raise
+    CleanJob.objects.filter(pk=job.pk, worker=worker_id).update(status='done', error='', finished_at=timezone.now())
+    job.status = 'done'
+    metrics.incr('jobs.completed')
+    return True
@@ -0,0 +1,428 @@
+"""
+词库匹配：Aho-Corasick 多模式自动机
+
+将某一分类下的全部词条与别名编译为自动机，单次从左到右扫描即可找出所有命中，
+并按“最左最长”语义选取不重叠的命中片段，用于 rm_brand / rm_forbiden 的批量删除。
+匹配分两路，命中位置均映射回原文：
+  - 子串：词条与文本仅做 NFKC + casefold（core.normalize.fold），可命中任意位置，与原逐词正则替换一致；
+  - 整词：词条与文本经完整规范化（leet、分隔符、复数还原），只接受落在规范化文本词边界上的命中，
+    "Cats"→"cat" 这类还原结果不会切进 category 等无关词。
+"""
+import logging
+import re
+import threading
+import time
+from collections import deque
+from typing import NamedTuple
+
+from . import metrics
+from .cache import LRUCache
+from .normalize import fold, fold_with_map, is_word_char, normalize, normalize_with_map
+
+logger = logging.getLogger(__name__)
+
+
+def _phrase_order(s: str):
+    # 与原实现一致：长度降序，其次按小写字典序
+    return (-len(s), s.lower())
+
+
+class _Trie:
+    """Aho-Corasick 自动机本体：scan() 产出全部（允许重叠的）命中 (start, end)。"""
+
+    def __init__(self, keys):
+        # goto: 每个状态一个 dict；fail: 失败指针；out: 在该状态结束的模式长度
+        # dict_link: 沿失败链最近的“有输出”的状态，用于 O(命中数) 枚举输出
+        self._goto = [{}]
+        self._out = [0]
+        for key in keys:
+            state = 0
+            for ch in key:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(0)
+                state = nxt
+            self._out[state] = len(key)
+
+        n = len(self._goto)
+        self._fail = [0] * n
+        self._dict_link = [0] * n
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                cand = self._goto[f].get(ch, 0)
+                self._fail[nxt] = cand if cand != nxt else 0
+                fs = self._fail[nxt]
+                self._dict_link[nxt] = fs if self._out[fs] else self._dict_link[fs]
+
+    def scan(self, folded: str):
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        state = 0
+        for i, ch in enumerate(folded):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            s = state if out[state] else dict_link[state]
+            while s:
+                yield i + 1 - out[s], i + 1
+                s = dict_link[s]
+
+
+def _on_word_boundary(text: str, start: int, end: int) -> bool:
+    return ((start == 0 or not is_word_char(text[start - 1]))
+            and (end == len(text) or not is_word_char(text[end])))
+
+
+class PhraseAutomaton:
+    """多短语匹配器（子串 + 规范化整词两路，最左最长、不重叠）。"""
+
+    def __init__(self, phrases):
+        ordered = sorted(set((p or '').strip() for p in phrases if p), key=_phrase_order)
+        # 折叠/规范化后的 key -> 词库原文列表（按排序，finditer 取第一个）
+        self._literal = {}
+        self._normalized = {}
+        for p in ordered:
+            if not p:
+                continue
+            self._literal.setdefault(fold(p), []).append(p)
+            key = normalize(p)
+            if key:
+                self._normalized.setdefault(key, []).append(p)
+        self.phrases = tuple(ordered)
+        self._literal_trie = _Trie(self._literal)
+        self._normalized_trie = _Trie(self._normalized)
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def _candidates(self, text: str):
+        """两路扫描，产出 (原文 start, 原文 end, 命中 key 对应的词库原文列表)。"""
+        folded, starts, ends = fold_with_map(text)
+        for start, end in self._literal_trie.scan(folded):
+            yield starts[start], ends[end - 1], self._literal[folded[start:end]]
+        normed, starts, ends = normalize_with_map(text)
+        for start, end in self._normalized_trie.scan(normed):
+            if _on_word_boundary(normed, start, end):
+                yield starts[start], ends[end - 1], self._normalized[normed[start:end]]
+
+    def matched_phrases(self, text: str):
+        """返回文本中出现过的全部词库原文（允许重叠）。"""
+        found = set()
+        if not text or not self.phrases:
+            return found
+        for _, _, phrases in self._candidates(text):
+            found.update(phrases)
+        return found
+
+    def finditer(self, text: str):
+        """按最左最长语义依次产出 (原文 start, 原文 end, 词库原文)。"""
+        if not text or not self.phrases:
+            return
+        # 同一起点取最长；等长时先到者（子串一路）优先
+        best = {}
+        for start, end, phrases in self._candidates(text):
+            if start not in best or end > best[start][0]:
+                best[start] = (end, phrases[0])
+        pos = 0
+        for start in sorted(best):
+            if start < pos:
+                continue
+            end, phrase = best[start]
+            yield start, end, phrase
+            pos = end
+
+    def remove(self, text: str):
+        """删除全部命中片段，返回 (清洗后文本, 被删除的词库原文列表)。"""
+        parts = []
+        removed = []
+        pos = 0
+        for start, end, phrase in self.finditer(text):
+            parts.append(text[pos:start])
+            removed.append(phrase)
+            pos = end
+        if not removed:
+            return text, []
+        parts.append(text[pos:])
+        return ''.join(parts), removed
+
+
+def remove_phrases_reference(text: str, phrases):
+    """
+    参考实现（原 rm_brand / rm_forbiden 逻辑）：按长度降序逐个短语正则替换。
+    保留用于结果比对与回退。
+    """
+    uniq_phrases = sorted(set(p.strip() for p in phrases if p), key=_phrase_order)
+    cleaned = text
+    removed = []
+    for p in uniq_phrases:
+        if not p:
+            continue
+        pattern = re.compile(re.escape(p), flags=re.IGNORECASE)
+        if pattern.search(cleaned):
+            cleaned = pattern.sub('', cleaned)
+            removed.append(p)
+    return cleaned, removed
+
+
+# ---------------- 按词边界删除一组临时短语（LLM 抽取的品牌词、hotwords） ----------------
+class BoundaryMatcher:
+    """
+    将一组短语编译为一个 \\b(?:p1|p2|...)\\b 组合正则（长度降序，不区分大小写），
+    单次扫描完成全部查找与删除，取代逐短语 compile + sub。
+    """
+
+    def __init__(self, phrases):
+        ordered = sorted(set((p or '').strip() for p in phrases if p and p.strip()), key=_phrase_order)
+        self.phrases = tuple(ordered)
+        # 小写 -> 短语原文（同一小写形式取排序靠前的一个）
+        self._by_lower = {}
+        for p in ordered:
+            self._by_lower.setdefault(p.lower(), p)
+        self._pattern = None
+        if ordered:
+            self._pattern = re.compile(
+                r'\b(?:' + '|'.join(re.escape(p) for p in ordered) + r')\b', flags=re.IGNORECASE
+            )
+
+    def _phrase_for(self, matched: str) -> str:
+        p = self._by_lower.get(matched.lower())
+        if p is not None:
+            return p
+        # IGNORECASE 的大小写折叠与 str.lower 不一致时（少数非 ASCII 字符）逐个确认
+        for p in self.phrases:
+            if re.fullmatch(re.escape(p), matched, flags=re.IGNORECASE):
+                return p
+        return matched
+
+    def finditer(self, text: str):
+        """依次产出 (start, end, 短语原文)，命中互不重叠。"""
+        if not text or self._pattern is None:
+            return
+        for m in self._pattern.finditer(text):
+            yield m.start(), m.end(), self._phrase_for(m.group(0))
+
+    def found(self, text: str):
+        """text 中出现过的短语集合。"""
+        return {phrase for _, _, phrase in self.finditer(text)}
+
+    def remove(self, text: str):
+        """删除全部命中，返回 (清洗后文本, 被删除片段 [(start, end, 短语原文)]，区间为原文坐标)。"""
+        parts = []
+        spans = []
+        pos = 0
+        for start, end, phrase in self.finditer(text):
+            parts.append(text[pos:start])
+            spans.append((start, end, phrase))
+            pos = end
+        if not spans:
+            return text, []
+        parts.append(text[pos:])
+        return ''.join(parts), spans
+
+
+_BOUNDARY_MATCHERS = LRUCache(256)
+
+
+def get_boundary_matcher(phrases) -> BoundaryMatcher:
+    """按短语集合缓存编译结果，同一组品牌词/hotwords 重复出现时不再重新编译。"""
+    key = frozenset((p or '').strip() for p in phrases if p and p.strip())
+    matcher = _BOUNDARY_MATCHERS.get(key)
+    if matcher is None:
+        matcher = BoundaryMatcher(key)
+        _BOUNDARY_MATCHERS.set(key, matcher)
+    return matcher
+
+
+def boundary_matcher_stats():
+    return _BOUNDARY_MATCHERS.stats()
+
+
+# ---------------- 词库快照（按 LexiconVersion 懒重建） ----------------
+class LexiconEntry(NamedTuple):
+    text: str        # 词条或别名原文（已 strip）
+    lower: str
+    norm: str        # core.normalize 规范化结果，匹配与打分均基于该字段
+    word_id: int
+    word: str        # 所属词条原文
+    category: str    # 分类名（原样）
+    is_alias: bool
+
+
+class LexiconSnapshot:
+    """
+    某一词库版本的只读内存快照：启用的词条、其别名与分类。
+    快照内容构建后不再修改；按分类编译的自动机在首次使用时生成并缓存在快照上。
+    """
+
+    def __init__(self, version, entries, categories):
+        self.version = version
+        self.entries = tuple(entries)
+        self.categories = dict(categories)  # name -> description
+        self._by_category = {}
+        for e in self.entries:
+            self._by_category.setdefault(e.category.lower(), []).append(e)
+        self._automata = {}
+        self._all_automaton = None
+        self._trigram_index = None
+        self._trigram_thread = None
+        self._entries_by_text = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, version):
+        from .models import Category, Word, WordAlias
+        entries = []
+        words = Word.objects.filter(is_active=True).values_list('id', 'word', 'category__name').order_by('id')
+        word_map = {}
+        for wid, word, cat in words:
+            text = (word or '').strip()
+            word_map[wid] = (word, cat or 'unknown')
+            if text:
+                entries.append(LexiconEntry(text, text.lower(), normalize(text), wid, word, cat or 'unknown', False))
+        aliases = WordAlias.objects.filter(word__is_active=True).values_list('word_id', 'alias').order_by('id')
+        for wid, alias in aliases:
+            text = (alias or '').strip()
+            if text and wid in word_map:
+                word, cat = word_map[wid]
+                entries.append(LexiconEntry(text, text.lower(), normalize(text), wid, word, cat, True))
+        categories = Category.objects.values_list('name', 'description')
+        return cls(version, entries, categories)
+
+    def match_entries(self, text: str):
+        """返回文本中出现的全部词条/别名（匹配规则同 PhraseAutomaton），耗时与文本长度成正比。"""
+        if self._all_automaton is None:
+            with self._lock:
+                if self._all_automaton is None:
+                    by_text = {}
+                    for e in self.entries:
+                        by_text.setdefault(e.text, []).append(e)
+                    self._entries_by_text = by_text
+                    self._all_automaton = PhraseAutomaton(by_text.keys())
+        by_text = self._entries_by_text
+        out = []
+        for phrase in self._all_automaton.matched_phrases(text):
+            out.extend(by_text.get(phrase, ()))
+        return out
+
+    def trigram_index(self):
+        """
+        按分类分区的 trigram 倒排索引。首次调用时在后台线程构建，不阻塞请求；
+        构建完成前返回上一次构建好的索引（可能来自旧版本词库），从未构建过时返回 None。
+        """
+        index = self._trigram_index
+        if index is not None:
+            return index
+        self.start_trigram_build()
+        return _LAST_TRIGRAM_INDEX
+
+    def start_trigram_build(self):
+        with self._lock:
+            if self._trigram_index is not None or self._trigram_thread is not None:
+                return
+            self._trigram_thread = threading.Thread(
+                target=self._build_trigram_index, name='trigram-index-build', daemon=True,
+            )
+        self._trigram_thread.start()
+
+    def _build_trigram_index(self):
+        global _LAST_TRIGRAM_INDEX
+        from django.conf import settings
+        from .trigram import TrigramIndex
+        started = time.monotonic()
+        try:
+            index = TrigramIndex(
+                self.entries,
+                max_postings=getattr(settings, 'TRIGRAM_INDEX_MAX_POSTINGS', 20_000_000),
+                max_df=getattr(settings, 'TRIGRAM_MAX_DF', 10_000),
+                min_overlap=getattr(settings, 'TRIGRAM_MIN_OVERLAP', 0.5),
+                version=self.version,
+            )
+        except Exception:
+            logger.exception('trigram 索引构建失败（词库版本 %s）', self.version)
+            with self._lock:
+                self._trigram_thread = None
+            return
+        self._trigram_index = index
+        _LAST_TRIGRAM_INDEX = index
+        metrics.set_gauge('trigram_index.build_seconds', round(time.monotonic() - started, 3))
+        metrics.set_gauge('trigram_index.version', self.version)
+
+    def entries_for(self, category_names):
+        """按分类名（大小写不敏感）取词条与别名。"""
+        out = []
+        for name in category_names:
+            out.extend(self._by_category.get((name or '').lower(), ()))
+        return out
+
+    def automaton(self, category_name: str) -> PhraseAutomaton:
+        key = (category_name or '').lower()
+        automaton = self._automata.get(key)
+        if automaton is None:
+            with self._lock:
+                automaton = self._automata.get(key)
+                if automaton is None:
+                    automaton = PhraseAutomaton(e.text for e in self._by_category.get(key, ()))
+                    self._automata[key] = automaton
+        return automaton
+
+
+_SNAPSHOT = None
+_SNAPSHOT_CHECKED_AT = 0.0
+# 最近一次构建完成的 trigram 索引：新版本词库的索引在后台构建期间继续使用
+_LAST_TRIGRAM_INDEX = None
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def _current_version():
+    from .models import LexiconVersion
+    return LexiconVersion.objects.filter(pk=1).values_list('version', flat=True).first() or 0
+
+
+def get_snapshot() -> LexiconSnapshot:
+    """
+    返回当前词库快照。每隔 LEXICON_VERSION_CHECK_SECONDS 秒读取一次数据库中的版本号，
+    仅当版本变化时才重新加载词库。
+    """
+    global _SNAPSHOT, _SNAPSHOT_CHECKED_AT
+    from django.conf import settings
+    interval = float(getattr(settings, 'LEXICON_VERSION_CHECK_SECONDS', 1.0))
+    snap = _SNAPSHOT
+    now = time.monotonic()
+    if snap is not None and now - _SNAPSHOT_CHECKED_AT < interval:
+        return snap
+    with _SNAPSHOT_LOCK:
+        snap = _SNAPSHOT
+        if snap is not None and now - _SNAPSHOT_CHECKED_AT < interval:
+            return snap
+        version = _current_version()
+        if snap is None or snap.version != version:
+            snap = LexiconSnapshot.load(version)
+            _SNAPSHOT = snap
+            if getattr(settings, 'LEXICON_CANDIDATES', 'fts') == 'trigram':
+                # 词库变化后立即在后台重建 trigram 索引，不等首个请求触发
+                snap.start_trigram_build()
+        _SNAPSHOT_CHECKED_AT = now
+    return snap
+
+
+def invalidate_snapshot():
+    """丢弃本进程快照（本进程内的词库写入会立即生效，其他进程依赖版本号）。"""
+    global _SNAPSHOT
+    with _SNAPSHOT_LOCK:
+        _SNAPSHOT = None
+
+
+def load_category_phrases(category_name: str):
+    return [e.text for e in get_snapshot().entries_for([category_name])]
+
+
+def get_category_automaton(category_name: str) -> PhraseAutomaton:
+    return get_snapshot().automaton(category_name)
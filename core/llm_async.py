@@ -0,0 +1,189 @@
+"""
+LLM 请求的 asyncio 并发扇出
+
+批量清洗的 LLM 阶段（品牌词抽取、同义判断）以协程并发发出，而不是每个请求占用一个阻塞线程：
+  - 进程内一个常驻事件循环线程与一个共享的 httpx.AsyncClient（长连接池）；
+  - 全局信号量限制整个进程同时在途的 LLM 请求数（LLM_GLOBAL_CONCURRENCY）；
+  - 每次 fan_out 另有单请求并发上限与截止时刻，超时未完成的调用取消并返回 None；
+    同一批量请求的各个 LLM 阶段（含逐条兜底）共用一个截止时刻，总耗时不超过 LLM_BATCH_DEADLINE；
+  - 与同步路径共用 core.circuit_breaker 的熔断状态与自适应超时。
+同步视图通过 fan_out 桥接进入事件循环并阻塞等待结果。
+
+httpx 随 langchain-openai（openai）依赖安装；不可用或 LLM_ASYNC_ENABLED=False 时
+退化为有界线程池执行同步实现，接口与语义保持一致。
+"""
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from . import metrics
+from .circuit_breaker import get_deepseek_breaker
+from .http_client import CircuitOpenError, is_failure_status
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover - 依赖缺失时走线程池
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+_loop = None
+_client = None
+_global_sem = None
+_loop_lock = threading.Lock()
+_in_flight = 0
+
+
+def _setting(name, default):
+    from django.conf import settings
+    return getattr(settings, name, default)
+
+
+def enabled() -> bool:
+    return httpx is not None and bool(_setting('LLM_ASYNC_ENABLED', True))
+
+
+def _ensure_loop():
+    global _loop, _global_sem
+    if _loop is not None:
+        return _loop
+    with _loop_lock:
+        if _loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='llm-async-loop', daemon=True).start()
+            _global_sem = asyncio.Semaphore(int(_setting('LLM_GLOBAL_CONCURRENCY', 64)))
+            _loop = loop
+    return _loop
+
+
+def _get_client():
+    # 仅在事件循环线程内调用
+    global _client
+    if _client is None:
+        size = int(_setting('LLM_GLOBAL_CONCURRENCY', 64))
+        _client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=size, max_keepalive_connections=size),
+            follow_redirects=False,
+        )
+    return _client
+
+
+async def post(url: str, *, json=None, headers=None, timeout=10):
+    """异步 POST，受全局并发上限约束；连接错误与 429/5xx 按 DEEPSEEK_HTTP_RETRIES 指数退避重试，读取超时不重试。"""
+    global _in_flight
+    retries = int(_setting('DEEPSEEK_HTTP_RETRIES', 2))
+    backoff = float(_setting('DEEPSEEK_HTTP_BACKOFF', 0.3))
+    breaker = get_deepseek_breaker()
+    client = _get_client()
+    async with _global_sem:
+        if not breaker.allow():
+            raise CircuitOpenError(f'circuit open: {url}')
+        read_timeout = breaker.timeout(timeout)
+        connect_timeout = min(float(_setting('DEEPSEEK_CONNECT_TIMEOUT', 3.05)), read_timeout)
+        _in_flight += 1
+        started = time.monotonic()
+        ok = False
+        try:
+            for attempt in range(retries + 1):
+                try:
+                    resp = await client.post(
+                        url, json=json, headers=headers,
+                        timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                    )
+                    if not is_failure_status(resp.status_code) or attempt == retries:
+                        ok = not is_failure_status(resp.status_code)
+                        return resp
+                except (httpx.ConnectError, httpx.ConnectTimeout):
+                    # 仅重试连接阶段的错误；ReadTimeout 等读取错误直接抛出，保持单次调用的超时上限
+                    if attempt == retries:
+                        raise
+                await asyncio.sleep(backoff * (2 ** attempt))
+        finally:
+            _in_flight -= 1
+            breaker.record(ok, time.monotonic() - started, timeout)
+
+
+async def _gather(jobs, limit: int, deadline: float):
+    sem = asyncio.Semaphore(max(1, limit))
+
+    async def one(job):
+        async with sem:
+            try:
+                return await job()
+            except Exception:
+                logger.warning('LLM 异步调用失败', exc_info=True)
+                return None
+
+    tasks = [asyncio.ensure_future(one(job)) for job in jobs]
+    done, pending = await asyncio.wait(tasks, timeout=deadline)
+    for t in pending:
+        t.cancel()
+    if pending:
+        metrics.incr('llm_async.deadline_cancelled', len(pending))
+    return [t.result() if t in done else None for t in tasks]
+
+
+def deadline_after(seconds=None) -> float:
+    """返回 seconds（默认 LLM_BATCH_DEADLINE）秒后的绝对截止时刻（time.monotonic 时基）。"""
+    return time.monotonic() + float(seconds or _setting('LLM_BATCH_DEADLINE', 60))
+
+
+def expired(deadline) -> bool:
+    return deadline is not None and time.monotonic() >= deadline
+
+
+def fan_out(async_fn, sync_fn, items, limit=None, deadline=None):
+    """
+    对 items 中每一项并发调用 async_fn(item)（协程路径）或 sync_fn(item)（线程池路径），
+    返回与 items 顺序一致的结果列表；失败或超过截止时刻的项为 None。
+    deadline 为绝对截止时刻（deadline_after() 的返回值），同一批量请求的多次 fan_out 应共用一个；
+    未传入时自本次调用起 LLM_BATCH_DEADLINE 秒。
+    """
+    items = list(items)
+    if not items:
+        return []
+    limit = int(limit or _setting('LLM_REQUEST_CONCURRENCY', 32))
+    if deadline is None:
+        deadline = deadline_after()
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        metrics.incr('llm_async.deadline_skipped', len(items))
+        return [None] * len(items)
+    started = time.monotonic()
+    try:
+        if enabled():
+            loop = _ensure_loop()
+            jobs = [lambda item=item: async_fn(item) for item in items]
+            future = asyncio.run_coroutine_threadsafe(_gather(jobs, limit, remaining), loop)
+            return future.result(remaining + 5)
+        return _thread_fan_out(sync_fn, items, limit, remaining)
+    finally:
+        metrics.incr('llm_async.fan_out_calls')
+        metrics.incr('llm_async.fan_out_items', len(items))
+        metrics.set_gauge('llm_async.last_fan_out_seconds', round(time.monotonic() - started, 3))
+
+
+def _thread_fan_out(sync_fn, items, limit: int, deadline: float):
+    # 线程池路径：并发受 limit 约束，超过截止时间未完成的项返回 None（线程本身无法取消，结果丢弃）
+    ex = ThreadPoolExecutor(max_workers=min(limit, len(items)), thread_name_prefix='llm-fan-out')
+    futures = [ex.submit(sync_fn, item) for item in items]
+    done, _ = wait(futures, timeout=deadline)
+    ex.shutdown(wait=False, cancel_futures=True)
+    results = []
+    for f in futures:
+        try:
+            results.append(f.result() if f in done else None)
+        except Exception:
+            logger.warning('LLM 调用失败', exc_info=True)
+            results.append(None)
+    return results
+
+
+def stats():
+    return {
+        'mode': 'asyncio' if enabled() else 'threads',
+        'in_flight': _in_flight,
+        'global_limit': int(_setting('LLM_GLOBAL_CONCURRENCY', 64)),
+    }
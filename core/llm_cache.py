@@ -0,0 +1,184 @@
+"""
+LLM 调用结果的两级缓存：进程内 LRU + 数据库表（带 TTL）
+
+命中分布高度倾斜，同一 (token, 词条) 同义判断、同一商品标题的品牌词抽取会在不同请求、店铺间反复出现；
+先查内存，未命中再查库，库中命中回填内存，均未命中才调用 API。
+数据库读写失败（如迁移前、库被锁）时只退化为内存缓存，不影响主流程。
+"""
+import hashlib
+import logging
+import unicodedata
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class SynonymVerdictCache:
+    """同义判断结果缓存，key 为 (模型名, 排序后的两个词)，与参数顺序无关。"""
+
+    MAX_TERM_LENGTH = 255
+
+    def __init__(self, maxsize=50000, ttl=30 * 86400):
+        self.ttl = float(ttl)
+        self._memory = LRUCache(maxsize, ttl=self.ttl)
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(a: str, b: str, model: str):
+        x, y = sorted(((a or '').strip().lower(), (b or '').strip().lower()))
+        return model, x, y
+
+    def get(self, a: str, b: str, model: str):
+        """返回缓存的 True/False，未命中返回 None。"""
+        key = self.key(a, b, model)
+        verdict = self._memory.get(key)
+        if verdict is not None:
+            return verdict
+        row = None
+        if max(len(key[1]), len(key[2])) <= self.MAX_TERM_LENGTH:
+            try:
+                from .models import SynonymVerdict
+                row = (SynonymVerdict.objects
+                       .filter(model=key[0], term_a=key[1], term_b=key[2],
+                               created_at__gte=timezone.now() - timedelta(seconds=self.ttl))
+                       .values_list('verdict', 'created_at').first())
+            except Exception:
+                logger.warning('读取同义判断缓存失败', exc_info=True)
+        if row is None:
+            self.misses += 1
+            return None
+        self.db_hits += 1
+        verdict, created_at = row
+        # 内存中的剩余有效期与库中记录一致
+        remaining = self.ttl - (timezone.now() - created_at).total_seconds()
+        self._memory.set(key, verdict, ttl=max(1.0, remaining))
+        return verdict
+
+    def set(self, a: str, b: str, model: str, verdict: bool):
+        key = self.key(a, b, model)
+        verdict = bool(verdict)
+        self._memory.set(key, verdict)
+        if max(len(key[1]), len(key[2])) > self.MAX_TERM_LENGTH:
+            return
+        try:
+            from .models import SynonymVerdict
+            # 单条 INSERT ... ON CONFLICT DO UPDATE：避免 update_or_create 先读后写在 SQLite 上多线程并发时锁升级失败
+            SynonymVerdict.objects.bulk_create(
+                [SynonymVerdict(model=key[0], term_a=key[1], term_b=key[2], verdict=verdict, created_at=timezone.now())],
+                update_conflicts=True,
+                unique_fields=['model', 'term_a', 'term_b'],
+                update_fields=['verdict', 'created_at'],
+            )
+        except Exception:
+            logger.warning('写入同义判断缓存失败', exc_info=True)
+
+    def clear(self):
+        self._memory.clear()
+
+    def stats(self):
+        memory = self._memory.stats()
+        return {
+            'memory_size': memory['size'],
+            'memory_hits': memory['hits'],
+            'db_hits': self.db_hits,
+            'misses': self.misses,
+        }
+
+
+class BrandExtractionCache:
+    """品牌词抽取结果缓存，key 为 提示词版本 + 规范化文本的 sha256。"""
+
+    def __init__(self, maxsize=20000, ttl=30 * 86400):
+        self.ttl = float(ttl)
+        self._memory = LRUCache(maxsize, ttl=self.ttl)
+        self.db_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, prompt_version: str):
+        # 仅做 NFKC、casefold 与空白折叠：品牌词按原文大小写不敏感删除，
+        # 不做 leet/复数还原，避免把抽取结果套用到写法不同的文本上
+        norm = ' '.join(unicodedata.normalize('NFKC', text or '').casefold().split())
+        return f"{prompt_version}:{hashlib.sha256(norm.encode('utf-8')).hexdigest()}"
+
+    def get(self, text: str, prompt_version: str):
+        """返回缓存的品牌词列表，未命中返回 None。"""
+        key = self.key(text, prompt_version)
+        brands = self._memory.get(key)
+        if brands is not None:
+            return list(brands)
+        row = None
+        try:
+            from .models import BrandExtraction
+            row = (BrandExtraction.objects
+                   .filter(key=key, created_at__gte=timezone.now() - timedelta(seconds=self.ttl))
+                   .values_list('brands', 'created_at').first())
+        except Exception:
+            logger.warning('读取品牌词抽取缓存失败', exc_info=True)
+        if row is None:
+            self.misses += 1
+            return None
+        self.db_hits += 1
+        brands, created_at = row
+        brands = tuple(str(b) for b in (brands or ()))
+        remaining = self.ttl - (timezone.now() - created_at).total_seconds()
+        self._memory.set(key, brands, ttl=max(1.0, remaining))
+        return list(brands)
+
+    def set(self, text: str, prompt_version: str, brands):
+        key = self.key(text, prompt_version)
+        brands = tuple(brands)
+        self._memory.set(key, brands)
+        try:
+            from .models import BrandExtraction
+            BrandExtraction.objects.bulk_create(
+                [BrandExtraction(key=key, prompt_version=prompt_version, brands=list(brands), created_at=timezone.now())],
+                update_conflicts=True,
+                unique_fields=['key'],
+                update_fields=['prompt_version', 'brands', 'created_at'],
+            )
+        except Exception:
+            logger.warning('写入品牌词抽取缓存失败', exc_info=True)
+
+    def clear(self):
+        self._memory.clear()
+
+    def stats(self):
+        memory = self._memory.stats()
+        return {
+            'memory_size': memory['size'],
+            'memory_hits': memory['hits'],
+            'db_hits': self.db_hits,
+            'misses': self.misses,
+        }
+
+
+_SYNONYM_CACHE = None
+_BRAND_CACHE = None
+
+
+def get_synonym_cache() -> SynonymVerdictCache:
+    global _SYNONYM_CACHE
+    if _SYNONYM_CACHE is None:
+        from django.conf import settings
+        _SYNONYM_CACHE = SynonymVerdictCache(
+            maxsize=getattr(settings, 'SYNONYM_CACHE_SIZE', 50000),
+            ttl=getattr(settings, 'SYNONYM_CACHE_TTL', 30 * 86400),
+        )
+    return _SYNONYM_CACHE
+
+
+def get_brand_cache() -> BrandExtractionCache:
+    global _BRAND_CACHE
+    if _BRAND_CACHE is None:
+        from django.conf import settings
+        _BRAND_CACHE = BrandExtractionCache(
+            maxsize=getattr(settings, 'BRAND_CACHE_SIZE', 20000),
+            ttl=getattr(settings, 'BRAND_CACHE_TTL', 30 * 86400),
+        )
+    return _BRAND_CACHE
@@ -0,0 +1,78 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.jobs import JobLeaseLost, WORKER_ID, claim_job, job_progress, release_job, run_job
+
+
+class Command(BaseCommand):
+    help = "执行大批量清洗后台任务（/api/words/clean_multi/jobs 提交），按块写回结果与检查点，可随时中断并续跑"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='处理完当前队列中的任务后退出，默认持续轮询')
+        parser.add_argument('--poll-seconds', type=float, default=2.0, help='队列为空时的轮询间隔（秒），默认 2')
+        parser.add_argument('--chunk-size', type=int, default=0, help='每块条数（检查点粒度），默认 CLEAN_JOB_CHUNK_SIZE')
+        parser.add_argument('--parallelism', type=int, default=0, help='每块并发清洗的线程数，默认 CLEAN_JOB_PARALLELISM')
+
+    def handle(self, *args, **options):
+        stopping = {'flag': False}
+
+        def _stop(signum, frame):
+            # 当前块完成并写回检查点后退出
+            stopping['flag'] = True
+            self.stdout.write('收到退出信号，当前块完成后停止')
+
+        signal.signal(signal.SIGTERM, _stop)
+        signal.signal(signal.SIGINT, _stop)
+
+        self.stdout.write(f'清洗任务工作进程 {WORKER_ID} 已启动')
+        while not stopping['flag']:
+            job = claim_job()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_seconds'])
+                continue
+            self.stdout.write(f'开始任务 #{job.pk}：{job.processed}/{job.total}')
+            last_report = [0.0]
+
+            def _progress(job):
+                now = time.monotonic()
+                if now - last_report[0] < 5 and job.processed < job.total:
+                    return
+                last_report[0] = now
+                p = job_progress(job)
+                eta = f"，预计剩余 {p['eta_seconds']:.0f} 秒" if p['eta_seconds'] else ''
+                self.stdout.write(
+                    f"任务 #{job.pk}：{p['processed']}/{p['total']}（{p['percent']}%），"
+                    f"{p['throughput_per_second']} 条/秒{eta}"
+                )
+
+            try:
+                finished = run_job(
+                    job,
+                    chunk_size=options['chunk_size'] or None,
+                    parallelism=options['parallelism'] or None,
+                    on_progress=_progress,
+                    should_stop=lambda: stopping['flag'],
+                )
+            except JobLeaseLost:
+                self.stdout.write(self.style.WARNING(f'任务 #{job.pk} 已被其他工作进程接管'))
+                continue
+            except Exception as e:
+                if job.status == 'queued':
+                    self.stdout.write(self.style.WARNING(
+                        f'任务 #{job.pk} 出错（第 {job.attempts} 次），已在检查点 {job.processed}/{job.total} 放回队列：{e}'
+                    ))
+                    # 稍后重试，避免数据库锁等短暂错误期间反复抢占
+                    time.sleep(options['poll_seconds'])
+                else:
+                    self.stdout.write(self.style.ERROR(f'任务 #{job.pk} 失败：{e}'))
+                continue
+            if finished:
+                self.stdout.write(self.style.SUCCESS(f'任务 #{job.pk} 完成：{job.total} 条'))
+            else:
+                release_job(job)
+                self.stdout.write(f'任务 #{job.pk} 已在检查点 {job.processed}/{job.total} 放回队列')
+        self.stdout.write('工作进程退出')
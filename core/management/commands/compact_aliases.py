@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from core.models import WordAlias, lexicon_bulk_changes
+from core.normalize import fold
+
+
+def redundant_aliases(rows):
+    """
+    rows 为按 word_id 排序的 (别名 id, word_id, 词条文本, 别名文本)，返回可删除的别名 id 列表。
+    只删除 fold（NFKC + casefold）后与词条或同词条已保留别名相同的别名：子串匹配只做 fold，
+    leet、复数等完整规范化只在整词上生效（如与中文相邻时不视为词边界），仅规范化后相同的别名删除后会丢失召回。
+    """
+    redundant = []
+    kept = {}
+    for alias_id, word_id, word, alias in rows:
+        key = fold(alias)
+        seen = kept.setdefault(word_id, {fold(word)})
+        if not key or key in seen:
+            redundant.append(alias_id)
+        else:
+            seen.add(key)
+    return redundant
+
+
+class Command(BaseCommand):
+    help = "压缩词库别名：删除大小写/全角折叠后与所属词条（或同词条其他别名）相同的冗余别名"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--category',
+            type=str,
+            default='',
+            help='仅处理指定分类，默认全部分类'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='仅统计，不删除'
+        )
+
+    def handle(self, *args, **options):
+        category_name = (options.get('category') or '').strip()
+        dry_run = bool(options.get('dry_run'))
+
+        qs = WordAlias.objects.select_related('word').order_by('word_id', 'id')
+        if category_name:
+            qs = qs.filter(word__category__name__iexact=category_name)
+
+        rows = [
+            (a.id, a.word_id, a.word.word, a.alias)
+            for a in qs.iterator(chunk_size=2000)
+        ]
+        total = len(rows)
+        redundant = redundant_aliases(rows)
+
+        self.stdout.write(f"扫描别名 {total} 个，其中冗余 {len(redundant)} 个")
+        if dry_run or not redundant:
+            return
+
+        deleted = 0
+        with lexicon_bulk_changes(), transaction.atomic():
+            for i in range(0, len(redundant), 500):
+                n, _ = WordAlias.objects.filter(id__in=redundant[i:i + 500]).delete()
+                deleted += n
+
+        self.stdout.write(self.style.SUCCESS(
+            f"压缩完成：删除冗余别名 {deleted} 个，保留 {total - len(redundant)} 个"
+        ))
@@ -0,0 +1,218 @@
+import difflib
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+# 规则模式下不视为品牌词的常见词（首字母大写的普通词在商品标题中很常见）
+COMMON_WORDS = {
+    'a', 'an', 'and', 'for', 'with', 'the', 'of', 'in', 'on', 'to', 'by', 'or', 'set', 'pack', 'new',
+    'men', 'mens', 'women', 'womens', 'kids', 'boys', 'girls', 'baby', 'adult', 'adults', 'gift', 'gifts',
+    'birthday', 'christmas', 'small', 'large', 'mini', 'big', 'cute', 'black', 'white', 'red', 'blue',
+    'green', 'pink', 'grey', 'gray', 'steel', 'stainless', 'cotton', 'leather', 'plastic', 'wood',
+    'wooden', 'metal', 'portable', 'waterproof', 'wireless', 'electric', 'home', 'kitchen', 'outdoor',
+    'indoor', 'travel', 'camping', 'shoe', 'shoes', 'shirt', 'bag', 'bottle', 'water', 'case', 'cover',
+    'holder', 'box', 'tool', 'tools', 'knife', 'light', 'lamp', 'watch', 'band', 'phone', 'cable',
+    'charger', 'running', 'sports', 'premium', 'professional', 'heavy', 'duty', 'inch', 'pcs', 'size',
+}
+
+SYNONYM_RE = re.compile(r"Are '(.+?)' and '(.+?)' synonyms")
+NUMBERED_RE = re.compile(r'^\[(\d+)\] (.*)$', re.M)
+PAIR_RE = re.compile(r"^\[\d+\] '(.*)' \| '(.*)'$", re.M)
+
+
+def request_key(payload) -> str:
+    """录制/回放的匹配键：模型 + 消息内容（忽略 stream、temperature 等参数）。"""
+    body = json.dumps(
+        {'model': payload.get('model'), 'messages': payload.get('messages')},
+        sort_keys=True, ensure_ascii=False, separators=(',', ':'),
+    )
+    return hashlib.sha256(body.encode('utf-8')).hexdigest()
+
+
+def _rule_brands(text: str):
+    brands = []
+    for word in re.findall(r"[A-Za-z][A-Za-z0-9&'\-]*", text or ''):
+        if len(word) < 2 or word.lower() in COMMON_WORDS:
+            continue
+        # 全大写、首字母大写或词内大小写混排（如 iPhone）视为品牌词
+        if word.isupper() or word[0].isupper() or any(c.isupper() for c in word[1:]):
+            if word not in brands:
+                brands.append(word)
+    return brands
+
+
+def _rule_synonym(a: str, b: str) -> bool:
+    a, b = a.lower(), b.lower()
+    return a in b or b in a or difflib.SequenceMatcher(None, a, b).ratio() >= 0.8
+
+
+def rule_reply(payload) -> str:
+    """确定性规则回复：单条/批量同义判断、单条/批量品牌词抽取、商品词提取。"""
+    messages = payload.get('messages') or []
+    user = str(messages[-1].get('content', '')) if messages else ''
+    if '"answers"' in user:
+        pairs = PAIR_RE.findall(user)
+        return json.dumps({'answers': ['yes' if _rule_synonym(a, b) else 'no' for a, b in pairs]})
+    m = SYNONYM_RE.search(user)
+    if m:
+        return 'yes' if _rule_synonym(m.group(1), m.group(2)) else 'no'
+    if '"results"' in user:
+        items = NUMBERED_RE.findall(user)
+        return json.dumps({'results': [{'index': int(i), 'brands': _rule_brands(t)} for i, t in items]})
+    if '文本：' in user:
+        return json.dumps({'brands': _rule_brands(user.split('文本：', 1)[1])})
+    if '现在请处理我的输入：' in user:
+        words = re.findall(r'[A-Za-z]+', user.split('现在请处理我的输入：', 1)[1].lower())
+        pairs = Counter(f'{x} {y}' for x, y in zip(words, words[1:]) if x not in COMMON_WORDS or y not in COMMON_WORDS)
+        return ','.join(p.title() for p, _ in pairs.most_common(5)) or 'Product'
+    return 'ok'
+
+
+def completion_body(content: str, payload) -> dict:
+    return {
+        'id': 'stub-' + hashlib.md5(content.encode('utf-8')).hexdigest()[:12],
+        'object': 'chat.completion',
+        'created': int(time.time()),
+        'model': payload.get('model') or 'deepseek-chat',
+        'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+        'usage': {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0},
+    }
+
+
+class Command(BaseCommand):
+    help = "启动本地 OpenAI 兼容的 DeepSeek 替身服务（延迟/错误注入、JSONL 录制回放、规则模式），用于离线压测"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1', help='监听地址，默认 127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765, help='监听端口，默认 8765')
+        parser.add_argument(
+            '--mode', choices=('rules', 'replay', 'record'), default='rules',
+            help='rules：确定性规则回复；replay：按 --fixture 回放（未命中时按规则回复）；record：转发到 --upstream 并追加写入 --fixture'
+        )
+        parser.add_argument('--fixture', default='', help='JSONL 录制文件，每行 {"key", "request", "response"}')
+        parser.add_argument('--strict', action='store_true', help='replay 模式下未命中录制时返回 404，而不是按规则回复')
+        parser.add_argument('--upstream', default='https://api.deepseek.com', help='record 模式的真实接口根地址')
+        parser.add_argument('--latency-ms', type=float, default=0, help='每个请求的基础延迟（毫秒）')
+        parser.add_argument('--jitter-ms', type=float, default=0, help='在基础延迟上叠加 0~jitter 的随机延迟（毫秒）')
+        parser.add_argument('--error-rate', type=float, default=0, help='返回错误状态码的比例（0~1）')
+        parser.add_argument('--error-status', type=int, default=503, help='注入错误的状态码，默认 503')
+        parser.add_argument('--hang-rate', type=float, default=0, help='挂起不响应（模拟超时）的比例（0~1）')
+        parser.add_argument('--hang-seconds', type=float, default=30, help='挂起时长（秒），默认 30')
+        parser.add_argument('--seed', type=int, default=None, help='随机种子，便于复现注入序列')
+
+    def handle(self, *args, **options):
+        mode = options['mode']
+        fixture = options['fixture']
+        if mode in ('replay', 'record') and not fixture:
+            raise CommandError(f'--mode {mode} 需要指定 --fixture')
+        recorded = {}
+        if mode == 'replay':
+            try:
+                with open(fixture, encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if not line:
+                            continue
+                        row = json.loads(line)
+                        key = row.get('key') or request_key(row.get('request') or {})
+                        recorded[key] = row['response']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f'读取录制文件失败: {e}')
+
+        rng = random.Random(options['seed'])
+        rng_lock = threading.Lock()
+        write_lock = threading.Lock()
+        upstream = options['upstream'].rstrip('/')
+        stats = Counter()
+        stdout = self.stdout
+
+        def draw():
+            with rng_lock:
+                return rng.random(), rng.random(), rng.random()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def _send(self, status, body: dict):
+                data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                try:
+                    payload = json.loads(self.rfile.read(length) or b'{}')
+                except ValueError:
+                    return self._send(400, {'error': {'message': 'invalid json'}})
+                if not self.path.rstrip('/').endswith('chat/completions'):
+                    return self._send(404, {'error': {'message': f'unknown path {self.path}'}})
+
+                r_err, r_hang, r_jitter = draw()
+                delay = (options['latency_ms'] + r_jitter * options['jitter_ms']) / 1000.0
+                if delay > 0:
+                    time.sleep(delay)
+                if r_hang < options['hang_rate']:
+                    stats['hang'] += 1
+                    time.sleep(options['hang_seconds'])
+                    return self._send(504, {'error': {'message': 'stub hang'}})
+                if r_err < options['error_rate']:
+                    stats['error'] += 1
+                    return self._send(options['error_status'], {'error': {'message': 'stub injected error'}})
+
+                key = request_key(payload)
+                if mode == 'record':
+                    try:
+                        resp = requests.post(
+                            upstream + self.path, json=payload, timeout=60,
+                            headers={'Authorization': self.headers.get('Authorization', ''),
+                                     'Content-Type': 'application/json'},
+                        )
+                        body = resp.json()
+                    except (requests.RequestException, ValueError) as e:
+                        stats['upstream_error'] += 1
+                        return self._send(502, {'error': {'message': f'upstream error: {e}'}})
+                    if resp.status_code == 200:
+                        with write_lock, open(fixture, 'a', encoding='utf-8') as f:
+                            f.write(json.dumps({'key': key, 'request': payload, 'response': body}, ensure_ascii=False) + '\n')
+                        stats['recorded'] += 1
+                    return self._send(resp.status_code, body)
+                if mode == 'replay':
+                    if key in recorded:
+                        stats['replayed'] += 1
+                        return self._send(200, recorded[key])
+                    stats['replay_miss'] += 1
+                    if options['strict']:
+                        return self._send(404, {'error': {'message': 'no recorded response'}})
+                stats['rules'] += 1
+                return self._send(200, completion_body(rule_reply(payload), payload))
+
+            def log_message(self, format, *args):
+                pass
+
+        ThreadingHTTPServer.request_queue_size = 512
+        server = ThreadingHTTPServer((options['host'], options['port']), Handler)
+        server.daemon_threads = True
+        host, port = server.server_address[:2]
+        stdout.write(self.style.SUCCESS(
+            f'DeepSeek 替身服务已启动：http://{host}:{port}（mode={mode}），'
+            f'设置 DEEPSEEK_BASE_URL=http://{host}:{port} 后启动应用即可使用'
+        ))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            stdout.write(f'请求统计：{dict(stats)}')
@@ -6,7 +6,8 @@ import json
 import requests
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from core.models import Category, Word, WordAlias
+from core.models import Category, Word, WordAlias, lexicon_bulk_changes
+from core.normalize import normalize
 import re
 
 
@@ -178,7 +179,8 @@ class Command(BaseCommand):
         """批量导入词汇并生成别名"""
         imported_count = 0
         
-        with transaction.atomic():
+        # 逐行写入期间暂停候选索引同步与版本号递增，结束后统一重建一次
+        with lexicon_bulk_changes(), transaction.atomic():
             for word_text in words:
                 # 清理和验证词汇
                 clean_word = self._clean_word(word_text)
@@ -280,8 +282,10 @@ class Command(BaseCommand):
             # 添加空格
             aliases.add(word[:mid] + ' ' + word[mid:])
         
-        # 移除原词本身
+        # 移除原词本身，以及规范化后与原词相同的变体（大小写/leet/复数等在匹配时统一处理）
         aliases.discard(word)
+        base_norm = normalize(word)
+        aliases = {a for a in aliases if normalize(a) != base_norm}
         
         # 限制别名数量，避免过多
         return list(aliases)[:10]
\ No newline at end of file
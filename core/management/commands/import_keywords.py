@@ -1,6 +1,7 @@
 from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
-from core.models import Category, Word, WordAlias
+from core.models import Category, Word, WordAlias, lexicon_bulk_changes
+from core.normalize import normalize
 import os
 import csv
 import re
@@ -36,7 +37,7 @@ class Command(BaseCommand):
         parser.add_argument(
             '--aliases',
             action='store_true',
-            help='生成词条别名(最多10个变体)'
+            help='生成词条别名(最多10个变体，规范化后与原词相同的变体不入库)'
         )
         parser.add_argument(
             '--force-update',
@@ -116,7 +117,8 @@ class Command(BaseCommand):
         alias_count = 0
         skipped_count = 0
 
-        with transaction.atomic():
+        # 逐行写入期间暂停候选索引同步与版本号递增，结束后统一重建一次
+        with lexicon_bulk_changes(), transaction.atomic():
             for w in cleaned:
                 obj, created = Word.objects.get_or_create(
                     word=w,
@@ -203,9 +205,9 @@ class Command(BaseCommand):
         # leet 变体
         leet = lower.translate(str.maketrans({'a':'4','e':'3','i':'1','o':'0','s':'5','t':'7'}))
         variants.add(leet)
-        # 去除原词(case-insensitive)
-        norm_orig = s.lower()
-        variants = {v for v in variants if v and v.lower() != norm_orig}
+        # 去除原词，以及规范化后与原词相同的变体（大小写/leet/复数等在匹配时统一处理）
+        norm_orig = normalize(s)
+        variants = {v for v in variants if v and normalize(v) != norm_orig}
         # 截断长度并限制数量
         trimmed = [v[:200] for v in variants]
         return trimmed[:10]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from core.models import Category, Word, WordAlias, WordLog
+from core.models import Category, Word, WordAlias, WordLog, lexicon_bulk_changes
 import re
 
 class Command(BaseCommand):
@@ -196,37 +196,39 @@ class Command(BaseCommand):
         total_skipped_existing = 0
         total_aliases = 0
 
-        for cat_name, words in batches:
-            cat, sev = cat_objs[cat_name]
-            created_count = 0
-            skipped_count = 0
-            for w in words:
-                w = (w or '').strip()
-                if not w:
-                    continue
-                obj, created = Word.objects.get_or_create(
-                    word=w,
-                    defaults={'category': cat, 'severity': sev, 'is_active': True}
-                )
-                if created:
-                    total_created += 1
-                    created_count += 1
-                    # generate aliases for new words
-                    alias_created_count = 0
-                    for alias in gen_aliases(w):
-                        try:
-                            _, alias_created = WordAlias.objects.get_or_create(word=obj, alias=alias)
-                            if alias_created:
-                                alias_created_count += 1
-                                total_aliases += 1
-                        except Exception:
-                            pass
-                else:
-                    skipped_count += 1
-            self.stdout.write(self.style.SUCCESS(
-                f"Seeded {len(words)} words for category '{cat_name}' (created {created_count}, existing {skipped_count})"
-            ))
-            total_skipped_existing += skipped_count
+        # Suspend per-row FTS sync and lexicon version bumps; rebuild once when done
+        with lexicon_bulk_changes():
+            for cat_name, words in batches:
+                cat, sev = cat_objs[cat_name]
+                created_count = 0
+                skipped_count = 0
+                for w in words:
+                    w = (w or '').strip()
+                    if not w:
+                        continue
+                    obj, created = Word.objects.get_or_create(
+                        word=w,
+                        defaults={'category': cat, 'severity': sev, 'is_active': True}
+                    )
+                    if created:
+                        total_created += 1
+                        created_count += 1
+                        # generate aliases for new words
+                        alias_created_count = 0
+                        for alias in gen_aliases(w):
+                            try:
+                                _, alias_created = WordAlias.objects.get_or_create(word=obj, alias=alias)
+                                if alias_created:
+                                    alias_created_count += 1
+                                    total_aliases += 1
+                            except Exception:
+                                pass
+                    else:
+                        skipped_count += 1
+                self.stdout.write(self.style.SUCCESS(
+                    f"Seeded {len(words)} words for category '{cat_name}' (created {created_count}, existing {skipped_count})"
+                ))
+                total_skipped_existing += skipped_count
 
         self.stdout.write(self.style.SUCCESS(
             f"Total newly created words: {total_created}; existing encountered: {total_skipped_existing}; total aliases: {total_aliases}"
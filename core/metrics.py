@@ -0,0 +1,41 @@
+"""
+进程内运行指标：计数器、仪表值与按需采集的指标提供者，供 /api/metrics 输出。
+"""
+import threading
+from collections import defaultdict
+
+_lock = threading.Lock()
+_counters = defaultdict(int)
+_gauges = {}
+_providers = {}
+
+
+def incr(name: str, n: int = 1):
+    with _lock:
+        _counters[name] += n
+
+
+def set_gauge(name: str, value):
+    with _lock:
+        _gauges[name] = value
+
+
+def register(name: str, provider):
+    """注册一个返回 dict 的回调，在输出指标时调用（如缓存命中率、线程池状态）。"""
+    with _lock:
+        _providers[name] = provider
+
+
+def snapshot():
+    with _lock:
+        data = {
+            'counters': dict(_counters),
+            'gauges': dict(_gauges),
+        }
+        providers = dict(_providers)
+    for name, provider in providers.items():
+        try:
+            data[name] = provider()
+        except Exception as e:
+            data[name] = {'error': str(e)}
+    return data
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_trial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LexiconVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Lexicon Version',
+                'verbose_name_plural': 'Lexicon Version',
+            },
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_lexiconversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SynonymVerdict',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=64)),
+                ('term_a', models.CharField(max_length=255)),
+                ('term_b', models.CharField(max_length=255)),
+                ('verdict', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Synonym Verdict',
+                'verbose_name_plural': 'Synonym Verdicts',
+                'indexes': [models.Index(fields=['created_at'], name='core_synony_created_7d26a9_idx')],
+                'unique_together': {('model', 'term_a', 'term_b')},
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_synonymverdict'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BrandExtraction',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=128, unique=True)),
+                ('prompt_version', models.CharField(max_length=32)),
+                ('brands', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Brand Extraction',
+                'verbose_name_plural': 'Brand Extractions',
+                'indexes': [models.Index(fields=['created_at'], name='core_brande_created_64daad_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_brandextraction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LLMInflight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64, unique=True)),
+                ('owner', models.CharField(max_length=64)),
+                ('content', models.TextField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'LLM In-flight Call',
+                'verbose_name_plural': 'LLM In-flight Calls',
+                'indexes': [models.Index(fields=['expires_at'], name='core_llminf_expires_877b3d_idx')],
+            },
+        ),
+    ]
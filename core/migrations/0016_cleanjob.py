@@ -0,0 +1,58 @@
+# Generated by Django 4.2.30 on 2026-10-18 20:57
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_llminflight'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CleanJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('queued', '排队中'), ('running', '执行中'), ('done', '已完成'), ('failed', '失败')], default='queued', max_length=10)),
+                ('categories', models.JSONField(default=list)),
+                ('hotwords', models.CharField(blank=True, default='', max_length=500)),
+                ('total', models.IntegerField(default=0)),
+                ('processed', models.IntegerField(default=0)),
+                ('worker', models.CharField(blank=True, default='', max_length=64)),
+                ('heartbeat_at', models.DateTimeField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('elapsed_seconds', models.FloatField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Clean Job',
+                'verbose_name_plural': 'Clean Jobs',
+            },
+        ),
+        migrations.CreateModel(
+            name='CleanJobItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.IntegerField()),
+                ('original', models.TextField()),
+                ('cleaned', models.TextField(blank=True, null=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='items', to='core.cleanjob')),
+            ],
+            options={
+                'verbose_name': 'Clean Job Item',
+                'verbose_name_plural': 'Clean Job Items',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='cleanjob',
+            index=models.Index(fields=['status', 'created_at'], name='core_cleanj_status_e024fb_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='cleanjobitem',
+            unique_together={('job', 'index')},
+        ),
+    ]
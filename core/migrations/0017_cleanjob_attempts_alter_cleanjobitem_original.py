@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 21:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_cleanjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cleanjob',
+            name='attempts',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='cleanjobitem',
+            name='original',
+            field=models.TextField(blank=True, null=True),
+        ),
+    ]
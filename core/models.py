@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 import random
+import threading
+from contextlib import contextmanager
 # 新增：用于FTS5索引同步
 from django.db import connection
 from django.db.models.signals import post_save, post_delete
@@ -169,6 +171,125 @@ def remove_word_from_fts(sender, instance: Word, **kwargs):
     except Exception:
         pass
 
+# -------- FTS5 trigram 候选索引（lexicon_fts）：词条与别名 --------
+_lexicon_bulk = threading.local()
+
+
+def lexicon_bulk_active():
+    return getattr(_lexicon_bulk, 'depth', 0) > 0
+
+
+@receiver(post_save, sender=Word)
+def sync_word_to_lexicon_fts(sender, instance: Word, **kwargs):
+    if lexicon_bulk_active():
+        return
+    try:
+        from .fts import sync_word
+        sync_word(instance)
+    except Exception:
+        pass
+
+@receiver(post_delete, sender=Word)
+def remove_word_from_lexicon_fts(sender, instance: Word, **kwargs):
+    if lexicon_bulk_active():
+        return
+    try:
+        from .fts import delete_word
+        delete_word(instance.id)
+    except Exception:
+        pass
+
+@receiver(post_save, sender=WordAlias)
+def sync_alias_to_lexicon_fts(sender, instance: WordAlias, **kwargs):
+    if lexicon_bulk_active():
+        return
+    try:
+        from .fts import sync_alias
+        sync_alias(instance)
+    except Exception:
+        pass
+
+@receiver(post_delete, sender=WordAlias)
+def remove_alias_from_lexicon_fts(sender, instance: WordAlias, **kwargs):
+    if lexicon_bulk_active():
+        return
+    try:
+        from .fts import delete_alias
+        delete_alias(instance.id)
+    except Exception:
+        pass
+
+@receiver(post_save, sender=Category)
+def sync_category_to_lexicon_fts(sender, instance: Category, **kwargs):
+    if lexicon_bulk_active():
+        return
+    try:
+        from .fts import sync_category
+        sync_category(instance)
+    except Exception:
+        pass
+
+# -------- 词库版本号：所有进程共享，用于判断内存快照是否过期 --------
+class LexiconVersion(models.Model):
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Lexicon Version'
+        verbose_name_plural = 'Lexicon Version'
+
+    def __str__(self):
+        return f"v{self.version}"
+
+
+def bump_lexicon_version():
+    """词库（Category/Word/WordAlias）变更后调用：版本号 +1，并让本进程快照立即失效。"""
+    try:
+        from django.utils import timezone
+        updated = LexiconVersion.objects.filter(pk=1).update(
+            version=models.F('version') + 1, updated_at=timezone.now()
+        )
+        if not updated:
+            LexiconVersion.objects.get_or_create(pk=1, defaults={'version': 1})
+    except Exception:
+        # 迁移阶段表可能尚不存在
+        pass
+    from .lexicon import invalidate_snapshot
+    invalidate_snapshot()
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Word)
+@receiver(post_delete, sender=Word)
+@receiver(post_save, sender=WordAlias)
+@receiver(post_delete, sender=WordAlias)
+def on_lexicon_changed(sender, **kwargs):
+    if lexicon_bulk_active():
+        return
+    bump_lexicon_version()
+
+
+@contextmanager
+def lexicon_bulk_changes():
+    """
+    批量修改词库时使用：期间暂停逐行的候选索引同步与版本号递增，
+    结束后统一重建一次 lexicon_fts 并递增版本号。
+    """
+    depth = getattr(_lexicon_bulk, 'depth', 0)
+    _lexicon_bulk.depth = depth + 1
+    try:
+        yield
+    finally:
+        _lexicon_bulk.depth = depth
+        if depth == 0:
+            try:
+                from .fts import rebuild_lexicon_fts
+                rebuild_lexicon_fts()
+            except Exception:
+                pass
+            bump_lexicon_version()
+
 # ---------------- 调用使用日志 ----------------
 class UsageLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='usage_logs', null=True, blank=True)
@@ -232,4 +353,103 @@ class Trial(models.Model):
         verbose_name_plural = 'Trials'
 
     def __str__(self):
-        return f"{self.shopcode} - {self.times}"
\ No newline at end of file
+        return f"{self.shopcode} - {self.times}"
+# ---------------- LLM 结果缓存 ----------------
+class SynonymVerdict(models.Model):
+    """DeepSeek 同义判断结果：(model, term_a, term_b) 唯一，term_a <= term_b（与顺序无关）。"""
+    model = models.CharField(max_length=64)
+    term_a = models.CharField(max_length=255)
+    term_b = models.CharField(max_length=255)
+    verdict = models.BooleanField(default=False)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ('model', 'term_a', 'term_b')
+        indexes = [models.Index(fields=['created_at'])]
+        verbose_name = 'Synonym Verdict'
+        verbose_name_plural = 'Synonym Verdicts'
+
+    def __str__(self):
+        return f"{self.term_a} ~ {self.term_b}: {'yes' if self.verdict else 'no'}"
+
+
+class BrandExtraction(models.Model):
+    """DeepSeek 品牌词抽取结果：key 为 提示词版本 + 规范化文本的 sha256。"""
+    key = models.CharField(max_length=128, unique=True)
+    prompt_version = models.CharField(max_length=32)
+    brands = models.JSONField(default=list)
+    created_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['created_at'])]
+        verbose_name = 'Brand Extraction'
+        verbose_name_plural = 'Brand Extractions'
+
+    def __str__(self):
+        return f"{self.key}: {', '.join(self.brands)}"
+
+
+class LLMInflight(models.Model):
+    """跨进程 single-flight 锁行：持有者在 expires_at 前完成调用并写回 content，其他进程轮询复用。"""
+    key = models.CharField(max_length=64, unique=True)
+    owner = models.CharField(max_length=64)
+    content = models.TextField(null=True, blank=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=['expires_at'])]
+        verbose_name = 'LLM In-flight Call'
+        verbose_name_plural = 'LLM In-flight Calls'
+
+    def __str__(self):
+        return f"{self.key} ({self.owner})"
+
+
+# ---------------- 批量清洗后台任务 ----------------
+class CleanJob(models.Model):
+    """
+    大批量清洗任务（SQLite 任务队列）：输入逐条存为 CleanJobItem，由 manage.py clean_worker 执行。
+    processed 为检查点：下标小于 processed 的条目均已写回结果，重启后从检查点继续。
+    """
+    STATUS_CHOICES = (
+        ('queued', '排队中'),
+        ('running', '执行中'),
+        ('done', '已完成'),
+        ('failed', '失败'),
+    )
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    categories = models.JSONField(default=list)
+    hotwords = models.CharField(max_length=500, blank=True, default='')
+    total = models.IntegerField(default=0)
+    processed = models.IntegerField(default=0)
+    worker = models.CharField(max_length=64, blank=True, default='')
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+    attempts = models.IntegerField(default=0)  # 自上次推进检查点以来连续失败的次数，达到 CLEAN_JOB_MAX_ATTEMPTS 后标记失败
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    elapsed_seconds = models.FloatField(default=0)  # 累计执行耗时（不含排队与中断时间），用于计算吞吐
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'created_at'])]
+        verbose_name = 'Clean Job'
+        verbose_name_plural = 'Clean Jobs'
+
+    def __str__(self):
+        return f"#{self.pk} {self.status} {self.processed}/{self.total}"
+
+
+class CleanJobItem(models.Model):
+    job = models.ForeignKey(CleanJob, on_delete=models.CASCADE, related_name='items')
+    index = models.IntegerField()
+    original = models.TextField(null=True, blank=True)  # 非字符串输入存为 NULL，清洗结果为空字符串（与批量接口一致）
+    cleaned = models.TextField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ('job', 'index')
+        verbose_name = 'Clean Job Item'
+        verbose_name_plural = 'Clean Job Items'
+
+    def __str__(self):
+        return f"#{self.job_id}[{self.index}]"
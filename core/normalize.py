@@ -0,0 +1,125 @@
+"""
+词库与文本的统一规范化
+
+匹配前对词条、别名与输入文本做同一套规范化，取代在词库中为每个词存储大小写、leet、
+连字符、复数等变体别名：
+  1) NFKC（全角/兼容字符归一）并 casefold；
+  2) 词内 leet 还原（0→o 1→i 3→e 4→a 5→s 7→t 9→g，词内的 @→a、$→s）；
+  3) 分隔符归一：空白、连字符、下划线、斜杠统一为单个空格，撇号删除；
+  4) 简单复数还原：-ies→-y，-s→（不含 -ss/-us/-is，且词长 >= 4）。
+
+normalize_with_map 额外返回每个规范化字符在原文中的区间，用于把匹配结果映射回原文。
+fold / fold_with_map 只做第 1 步，用于子串匹配：leet 与复数还原只能作用于完整的词，
+否则 "arms"→"arm" 之类的还原结果会命中 warm、alarm 等无关词的内部。
+"""
+import unicodedata
+
+LEET = {'0': 'o', '1': 'i', '3': 'e', '4': 'a', '5': 's', '7': 't', '9': 'g', '@': 'a', '$': 's'}
+SEPARATORS = set(' \t\r\n\f\v-_/ ‐‑‒–—　')
+APOSTROPHES = set("'‘’`")
+
+
+def _expand(text: str):
+    """逐字符 NFKC + casefold，产出 (字符, 原文起点, 原文终点)。"""
+    for i, ch in enumerate(text):
+        if ch.isascii():
+            yield ch.lower(), i, i + 1
+            continue
+        for c in unicodedata.normalize('NFKC', ch).casefold():
+            yield c, i, i + 1
+
+
+def fold_with_map(text: str):
+    """仅 NFKC + casefold，返回 (折叠文本, starts, ends)，区间含义同 normalize_with_map。"""
+    out, starts, ends = [], [], []
+    for c, s, e in _expand(text or ''):
+        out.append(c)
+        starts.append(s)
+        ends.append(e)
+    return ''.join(out), starts, ends
+
+
+def fold(text: str) -> str:
+    return fold_with_map(text)[0]
+
+
+def is_word_char(c: str) -> bool:
+    return c.isalnum() or c in ('@', '$')
+
+
+def _flush_word(word, out, starts, ends):
+    """处理一个词：leet 还原与复数还原，写入输出。"""
+    chars = [c for c, _, _ in word]
+    n = len(chars)
+    # leet 仅作用于夹在字母之间的数字/符号段，或紧邻字母的单个数字（h0t、b00bs、4dult），
+    # 型号、价格等数字段（iphone15、s24、$20）保持原样
+    k = 0
+    while k < n:
+        if chars[k] not in LEET:
+            k += 1
+            continue
+        j = k
+        while j < n and chars[j] in LEET:
+            j += 1
+        left = k > 0 and chars[k - 1].isalpha()
+        right = j < n and chars[j].isalpha()
+        single_digit = j - k == 1 and chars[k].isdigit()
+        if (left and right) or (single_digit and (left or right)):
+            for m in range(k, j):
+                chars[m] = LEET[chars[m]]
+        k = j
+    tail_end = word[-1][2]
+    if n >= 5 and chars[-3:] == ['i', 'e', 's'] and all(c.isalpha() for c in chars):
+        chars = chars[:-3] + ['y']
+        word = word[:-3] + [('y', word[-3][1], tail_end)]
+    elif (n >= 4 and chars[-1] == 's' and chars[-2] not in ('s', 'u', 'i')
+          and all(c.isalpha() for c in chars)):
+        chars = chars[:-1]
+        word = word[:-1]
+    for k, c in enumerate(chars):
+        out.append(c)
+        starts.append(word[k][1])
+        # 被删除的复数后缀并入词尾字符的原文区间
+        ends.append(tail_end if k == len(chars) - 1 else word[k][2])
+
+
+def normalize_with_map(text: str):
+    """返回 (规范化文本, starts, ends)，第 i 个规范化字符对应原文 text[starts[i]:ends[i]]。"""
+    out, starts, ends = [], [], []
+    word = []
+    pending_sep = None
+    for c, s, e in _expand(text or ''):
+        if c in APOSTROPHES and word:
+            continue
+        if is_word_char(c):
+            if pending_sep is not None:
+                if out:
+                    out.append(' ')
+                    starts.append(pending_sep[0])
+                    ends.append(pending_sep[1])
+                pending_sep = None
+            word.append((c, s, e))
+            continue
+        if word:
+            _flush_word(word, out, starts, ends)
+            word = []
+        if c in SEPARATORS or c in APOSTROPHES:
+            if pending_sep is None:
+                pending_sep = (s, e)
+            continue
+        if pending_sep is not None:
+            if out:
+                out.append(' ')
+                starts.append(pending_sep[0])
+                ends.append(pending_sep[1])
+            pending_sep = None
+        out.append(c)
+        starts.append(s)
+        ends.append(e)
+    if word:
+        _flush_word(word, out, starts, ends)
+    return ''.join(out), starts, ends
+
+
+def normalize(text: str) -> str:
+    return normalize_with_map(text)[0]
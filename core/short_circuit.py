@@ -0,0 +1,86 @@
+"""
+批量清洗的短路规则表
+
+命中任一规则的文本（抓取页面中的按钮文字、价格、星级、纯数字等噪声行）清洗结果直接为空字符串，
+不再分词、查词库或调用 LLM。规则可通过 BATCH_SHORT_CIRCUIT_RULES 配置，每条为 (名称, 类型, 模式[, 提示词])：
+  - contains：子串匹配（忽略大小写）；
+  - fullmatch：正则匹配整段文本；
+  - search：正则在文本任意位置匹配（忽略大小写），可带一个必需的小写子串作为提示词，文本不含提示词时跳过该正则。
+规则在加载时按类型预编译：全部 contains 在同一份小写文本上做子串查找，fullmatch 正则逐条按配置顺序执行，
+search 正则只在提示词出现时执行。CPython 中逐字符尝试的大正则分支反而比子串查找慢，因此不合并为单个正则；
+fullmatch 也不合并为一个交替正则，否则规则自带的命名分组、编号反向引用会与外层分组冲突，命中错误的规则。
+命中的规则计入 short_circuit.<名称> 计数器。
+"""
+import re
+import threading
+
+from . import metrics
+
+DEFAULT_RULES = (
+    ('add_to_cart', 'contains', 'add to cart'),
+    ('customer_reviews', 'contains', 'customer reviews'),
+    ('price_word', 'contains', 'price'),
+    ('no_data', 'contains', '— no data'),  # 全角破折号
+    ('no_data', 'contains', '- no data'),  # 半角短横
+    ('amazon', 'contains', 'amazon'),
+    # 价格：例如 "$14.99"、"$ 14. 99" 或仅 "$"
+    ('price', 'fullmatch', r'\s*\$\s*(?:[\d,]+(?:\s*\.\s*\d+)?\s*)?'),
+    # 数字型元素（仅数字、逗号、小数点），作为列表项时应去掉
+    ('number', 'fullmatch', r'\s*[\d,\.]+\s*'),
+    # 星级：如 "4.7 out of 5 stars"
+    ('stars', 'search', r'\b\d+(?:\.\d+)?\s+out\s+of\s+\d+\s+stars\b', 'stars'),
+)
+
+
+class ShortCircuitRules:
+    def __init__(self, rules):
+        self.literals = []
+        self.fullmatches = []
+        self.searches = []
+        for rule in rules:
+            name, kind, pattern = rule[0], rule[1], rule[2]
+            if kind == 'contains':
+                self.literals.append((pattern.lower(), name))
+            elif kind == 'fullmatch':
+                self.fullmatches.append((re.compile(pattern, re.IGNORECASE), name))
+            elif kind == 'search':
+                hint = (rule[3] if len(rule) > 3 else '') or ''
+                self.searches.append((hint.lower(), re.compile(pattern, re.IGNORECASE), name))
+            else:
+                raise ValueError(f'unknown short-circuit rule kind: {kind!r}')
+
+    def _match(self, text: str):
+        lower = text.lower()
+        for literal, name in self.literals:
+            if literal in lower:
+                return name
+        for regex, name in self.fullmatches:
+            if regex.fullmatch(text):
+                return name
+        for hint, regex, name in self.searches:
+            if (not hint or hint in lower) and regex.search(text):
+                return name
+        return None
+
+    def match(self, text: str):
+        """返回命中的规则名（按 contains、fullmatch、search 的顺序取第一个），未命中返回 None。"""
+        if not text:
+            return None
+        name = self._match(text)
+        if name is not None:
+            metrics.incr(f'short_circuit.{name}')
+        return name
+
+
+_RULES = None
+_RULES_LOCK = threading.Lock()
+
+
+def get_short_circuit_rules() -> ShortCircuitRules:
+    global _RULES
+    if _RULES is None:
+        with _RULES_LOCK:
+            if _RULES is None:
+                from django.conf import settings
+                _RULES = ShortCircuitRules(getattr(settings, 'BATCH_SHORT_CIRCUIT_RULES', None) or DEFAULT_RULES)
+    return _RULES
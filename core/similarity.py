@@ -0,0 +1,69 @@
+"""
+字符串相似度内核
+
+以位并行 LCS（Allison-Dix / Hyyrö）计算 ratio = 2 * LCS / (len(a) + len(b))，
+与 difflib.SequenceMatcher(None, a, b).ratio() 同一量纲（difflib 的匹配块总长不超过 LCS，
+二者在常见短词上基本一致，且 LCS 结果不小于 difflib）。
+
+一个 token 对一组候选打分时只构建一次位掩码；先用长度上界做提前淘汰，
+低于 cutoff 的候选直接记 0.0，无需进入逐字符计算。
+"""
+import difflib
+
+
+def _match_masks(a: str):
+    masks = {}
+    for i, ch in enumerate(a):
+        masks[ch] = masks.get(ch, 0) | (1 << i)
+    return masks
+
+
+def _lcs_len(masks, la: int, b: str) -> int:
+    full = (1 << la) - 1
+    v = full
+    for ch in b:
+        m = masks.get(ch)
+        if m is None:
+            continue
+        u = v & m
+        v = ((v + u) | (v - u)) & full
+    return la - v.bit_count()
+
+
+def _engine():
+    from django.conf import settings
+    return getattr(settings, 'SIMILARITY_KERNEL', 'lcs')
+
+
+def ratios(token: str, candidates, cutoff: float = 0.0):
+    """
+    token 与每个候选的相似度列表（顺序与 candidates 一致）。
+    cutoff > 0 时，确定低于 cutoff 的候选返回 0.0。
+    """
+    a = token or ''
+    la = len(a)
+    if _engine() == 'difflib':
+        out = []
+        for b in candidates:
+            r = difflib.SequenceMatcher(None, a, b).ratio()
+            out.append(r if r >= cutoff else 0.0)
+        return out
+    masks = _match_masks(a)
+    out = []
+    for b in candidates:
+        lb = len(b)
+        total = la + lb
+        if total == 0:
+            out.append(1.0)
+            continue
+        # 上界：LCS 不超过较短串长度
+        if cutoff > 0 and 2.0 * min(la, lb) / total < cutoff:
+            out.append(0.0)
+            continue
+        r = 2.0 * _lcs_len(masks, la, b) / total
+        out.append(r if r >= cutoff else 0.0)
+    return out
+
+
+def ratio(a: str, b: str, cutoff: float = 0.0) -> float:
+    return ratios(a, [b], cutoff)[0]
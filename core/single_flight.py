@@ -0,0 +1,289 @@
+"""
+相同 LLM 请求的合并（single-flight）
+
+热门商品被多个用户同时清洗时，各工作线程会并发发出完全相同的品牌词抽取、同义判断提示词。
+以 (URL, 请求体) 的哈希为 key：同一进程内同时在途的相同请求只实际发出一次，其余调用方等待并共享结果
+（同步线程与事件循环协程各自合并）。
+
+可选跨进程模式（LLM_SINGLE_FLIGHT_CROSS_PROCESS）：借助 LLMInflight 表的唯一 key 行作为锁，
+抢到锁的进程发出请求并把回复写回该行，其余进程轮询读取；持有者超时（LLM_SINGLE_FLIGHT_LEASE）
+未完成时由等待方接管。等待不超过调用方的超时：先于租期到达时抛出 TimeoutError（同请求自身超时）。
+过期锁行的清理每进程至多每 _CLEANUP_SECONDS 秒一次，不在每次抢锁时写库。
+锁表读写失败时直接发出请求，不影响主流程。
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# 持有者标识：进程内唯一
+_OWNER = f"{os.getpid()}-{uuid.uuid4().hex[:12]}"
+# 已完成的结果在锁行中保留的秒数，供稍晚到达的等待方读取
+_RESULT_TTL = 5
+_POLL_SECONDS = 0.05
+# 过期锁行的清理间隔（秒）
+_CLEANUP_SECONDS = 60
+_last_cleanup = 0.0
+
+_GONE = object()
+_WAIT = object()
+
+
+def flight_key(url: str, payload) -> str:
+    body = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(f"{url}\n{body}".encode('utf-8')).hexdigest()
+
+
+def _setting(name, default):
+    from django.conf import settings
+    return getattr(settings, name, default)
+
+
+def _cross_process() -> bool:
+    return bool(_setting('LLM_SINGLE_FLIGHT_CROSS_PROCESS', False))
+
+
+def _lease() -> float:
+    return float(_setting('LLM_SINGLE_FLIGHT_LEASE', 30))
+
+
+# ---------------- 跨进程锁行 ----------------
+def _xp_cleanup(now):
+    global _last_cleanup
+    from .models import LLMInflight
+    if time.monotonic() - _last_cleanup < _CLEANUP_SECONDS:
+        return
+    _last_cleanup = time.monotonic()
+    LLMInflight.objects.filter(expires_at__lt=now - timedelta(seconds=60)).delete()
+
+
+def _xp_acquire(key: str) -> bool:
+    from .models import LLMInflight
+    now = timezone.now()
+    expires = now + timedelta(seconds=_lease())
+    _xp_cleanup(now)
+    try:
+        with transaction.atomic():
+            LLMInflight.objects.create(key=key, owner=_OWNER, expires_at=expires)
+        return True
+    except IntegrityError:
+        # 已过期（持有者崩溃/超时，或结果已过保留期）的锁行可被接管
+        taken = LLMInflight.objects.filter(key=key, expires_at__lt=now).update(
+            owner=_OWNER, expires_at=expires, content=None,
+        )
+        return taken == 1
+
+
+def _xp_poll(key: str):
+    from .models import LLMInflight
+    row = LLMInflight.objects.filter(key=key).values_list('content', 'expires_at').first()
+    if row is None:
+        return _GONE
+    content, expires_at = row
+    if content is not None:
+        return content
+    if expires_at < timezone.now():
+        return _GONE
+    return _WAIT
+
+
+def _xp_publish(key: str, content):
+    from .models import LLMInflight
+    rows = LLMInflight.objects.filter(key=key, owner=_OWNER)
+    if content is None:
+        # 非 200 等无结果的情况不共享，等待方自行重试
+        rows.delete()
+    else:
+        rows.update(content=content, expires_at=timezone.now() + timedelta(seconds=_RESULT_TTL))
+
+
+def _xp_release(key: str):
+    from .models import LLMInflight
+    LLMInflight.objects.filter(key=key, owner=_OWNER).delete()
+
+
+def _xp_step(key: str):
+    """一次抢锁/读取：返回 ('lead', None)、('done', content) 或 ('wait', None)。"""
+    if _xp_acquire(key):
+        return 'lead', None
+    state = _xp_poll(key)
+    if state is _WAIT or state is _GONE:
+        return 'wait', None
+    return 'done', state
+
+
+# ---------------- 同步（线程）路径 ----------------
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+_calls = {}
+_calls_lock = threading.Lock()
+
+
+def _wait_limit(timeout):
+    """返回 (等待秒数, 是否受调用方超时限制)。"""
+    lease = _lease()
+    if timeout is not None and float(timeout) < lease:
+        return float(timeout), True
+    return lease, False
+
+
+def _wait_timed_out():
+    metrics.incr('single_flight.wait_timeouts')
+    return TimeoutError('single-flight 等待其他进程的相同请求超时')
+
+
+def _run_cross_process(key: str, fn, timeout=None):
+    limit, by_caller = _wait_limit(timeout)
+    deadline = time.monotonic() + limit
+    while time.monotonic() < deadline:
+        try:
+            state, content = _xp_step(key)
+        except Exception:
+            logger.warning('single-flight 锁表不可用，直接请求', exc_info=True)
+            return fn()
+        if state == 'done':
+            metrics.incr('single_flight.cross_process_shared')
+            return content
+        if state == 'lead':
+            try:
+                content = fn()
+            except BaseException:
+                try:
+                    _xp_release(key)
+                except Exception:
+                    pass
+                raise
+            try:
+                _xp_publish(key, content)
+            except Exception:
+                logger.warning('single-flight 结果写回失败', exc_info=True)
+            return content
+        time.sleep(_POLL_SECONDS)
+    if by_caller:
+        raise _wait_timed_out()
+    # 等待超过租期仍无结果：不再等待，自行请求
+    return fn()
+
+
+def do(key: str, fn, timeout=None):
+    """
+    同一进程内同 key 的并发调用只执行一次 fn，其余调用共享其返回值或异常。
+    timeout 为调用方的请求超时（秒），跨进程等待不超过 min(timeout, 租期)。
+    """
+    with _calls_lock:
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+    if not leader:
+        metrics.incr('single_flight.shared')
+        call.event.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+    try:
+        call.result = _run_cross_process(key, fn, timeout) if _cross_process() else fn()
+        return call.result
+    except BaseException as e:
+        call.error = e
+        raise
+    finally:
+        with _calls_lock:
+            _calls.pop(key, None)
+        call.event.set()
+
+
+# ---------------- 协程路径（仅在 core.llm_async 的事件循环线程内使用） ----------------
+_async_calls = {}
+
+
+async def _arun_cross_process(key: str, coro_fn, timeout=None):
+    limit, by_caller = _wait_limit(timeout)
+    deadline = time.monotonic() + limit
+    while time.monotonic() < deadline:
+        try:
+            # 数据库访问不能在事件循环线程内进行
+            state, content = await asyncio.to_thread(_xp_step, key)
+        except Exception:
+            logger.warning('single-flight 锁表不可用，直接请求', exc_info=True)
+            return await coro_fn()
+        if state == 'done':
+            metrics.incr('single_flight.cross_process_shared')
+            return content
+        if state == 'lead':
+            try:
+                content = await coro_fn()
+            except BaseException:
+                try:
+                    await asyncio.to_thread(_xp_release, key)
+                except Exception:
+                    pass
+                raise
+            try:
+                await asyncio.to_thread(_xp_publish, key, content)
+            except Exception:
+                logger.warning('single-flight 结果写回失败', exc_info=True)
+            return content
+        await asyncio.sleep(_POLL_SECONDS)
+    if by_caller:
+        raise _wait_timed_out()
+    return await coro_fn()
+
+
+async def ado(key: str, coro_fn, timeout=None):
+    """do 的协程版本：同 key 的并发协程共享一次 coro_fn()；发起者被取消时等待方自行重试。"""
+    while True:
+        fut = _async_calls.get(key)
+        if fut is None:
+            break
+        metrics.incr('single_flight.shared')
+        try:
+            return await asyncio.shield(fut)
+        except asyncio.CancelledError:
+            if not fut.cancelled():
+                raise
+    fut = asyncio.get_running_loop().create_future()
+    _async_calls[key] = fut
+    try:
+        result = await (_arun_cross_process(key, coro_fn, timeout) if _cross_process() else coro_fn())
+        fut.set_result(result)
+        return result
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except BaseException as e:
+        fut.set_exception(e)
+        # 无等待方时避免 “exception was never retrieved” 警告
+        fut.exception()
+        raise
+    finally:
+        _async_calls.pop(key, None)
+
+
+def stats():
+    with _calls_lock:
+        in_flight = len(_calls)
+    return {
+        'in_flight_threads': in_flight,
+        'in_flight_async': len(_async_calls),
+        'cross_process': _cross_process(),
+    }
@@ -0,0 +1,143 @@
+import difflib
+import random
+
+from django.test import SimpleTestCase, override_settings
+
+from . import similarity
+from .cache import LRUCache, TokenCache
+from .management.commands.compact_aliases import redundant_aliases
+from .lexicon import PhraseAutomaton, remove_phrases_reference
+from .short_circuit import DEFAULT_RULES, ShortCircuitRules
+
+
+class PhraseAutomatonTests(SimpleTestCase):
+    def assertSameAsReference(self, phrases, text):
+        automaton = PhraseAutomaton(phrases)
+        cleaned, removed = automaton.remove(text)
+        ref_cleaned, ref_removed = remove_phrases_reference(text, phrases)
+        self.assertEqual(cleaned, ref_cleaned, text)
+        self.assertEqual(set(removed), set(ref_removed), text)
+
+    def test_matches_reference(self):
+        phrases = ['Nike', 'Coca Cola', 'cat', 'Cats', 'arms', 'guns', 'Under Armour', 'LEGO', 'straße']
+        texts = [
+            'Pet category toy, warm charm alarm, begun Gundam',
+            'NIKE running shoes and Coca Cola can',
+            'lego Star Wars set by Under Armour',
+            'Cats and cat toys',
+            'catalog of lego bricks',
+            'Schild: Straße 5',
+            '耐克 Nike 运动鞋',
+            '',
+        ]
+        for text in texts:
+            self.assertSameAsReference(phrases, text)
+
+    def test_plural_stripping_needs_whole_word(self):
+        automaton = PhraseAutomaton(['Cats', 'arms', 'guns'])
+        text = 'Pet category toy, warm charm alarm, begun Gundam'
+        self.assertEqual(automaton.remove(text), (text, []))
+        self.assertEqual(automaton.matched_phrases('Pet category toy warm'), set())
+
+    def test_normalized_whole_words(self):
+        automaton = PhraseAutomaton(['Nike', 'Coca Cola'])
+        cleaned, removed = automaton.remove('N1ke Nikes, coca-cola')
+        self.assertEqual(cleaned, ' , ')
+        self.assertEqual(removed, ['Nike', 'Nike', 'Coca Cola'])
+        self.assertEqual(automaton.remove('N1kesh'), ('N1kesh', []))
+
+
+class SimilarityKernelTests(SimpleTestCase):
+    """ratios() 与 difflib.SequenceMatcher 在打分阈值上的判定一致性。"""
+
+    @staticmethod
+    def _pairs(n, seed=7):
+        rnd = random.Random(seed)
+        alphabet = 'abcdeilmnorstuy'
+        pairs = []
+        for _ in range(n):
+            a = ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(3, 12)))
+            if rnd.random() < 0.3:
+                b = ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(3, 12)))
+            else:
+                b = list(a)
+                for _ in range(rnd.randint(0, 3)):
+                    op = rnd.random()
+                    pos = rnd.randrange(len(b) + 1)
+                    if op < 0.4:
+                        b.insert(pos, rnd.choice(alphabet))
+                    elif b and op < 0.7:
+                        del b[min(pos, len(b) - 1)]
+                    elif b:
+                        b[min(pos, len(b) - 1)] = rnd.choice(alphabet)
+                b = ''.join(b)
+            pairs.append((a, b))
+        return pairs
+
+    @override_settings(SIMILARITY_KERNEL='lcs')
+    def test_cutoff_decisions_match_difflib(self):
+        pairs = self._pairs(20000)
+        for cutoff, max_disagreement in ((0.6, 0.005), (0.92, 0.0)):
+            disagree = 0
+            for a, b in pairs:
+                fast = similarity.ratios(a, [b], cutoff)[0] >= cutoff
+                ref = difflib.SequenceMatcher(None, a, b).ratio() >= cutoff
+                disagree += fast != ref
+            self.assertLessEqual(disagree / len(pairs), max_disagreement, f'cutoff={cutoff}: {disagree} disagreements')
+
+    @override_settings(SIMILARITY_KERNEL='lcs')
+    def test_below_cutoff_scores_zero(self):
+        self.assertEqual(similarity.ratios('nike', ['adidas', 'nike', 'nikes'], 0.92), [0.0, 1.0, 0.0])
+        self.assertAlmostEqual(similarity.ratio('nike', 'nikes'), 2 * 4 / 9)
+        self.assertEqual(similarity.ratios('', ['']), [1.0])
+
+
+class TokenCacheTests(SimpleTestCase):
+    def test_unshared_put_stays_in_request(self):
+        shared = LRUCache(100)
+        cache = TokenCache(['forbidden'], 2, shared=shared)
+        cache.put('nike', 'stale', shared=False)
+        cache.put('adidas', 'fresh')
+        self.assertEqual(cache.get_many(['nike', 'adidas']), ({'nike': 'stale', 'adidas': 'fresh'}, []))
+        other = TokenCache(['forbidden'], 2, shared=shared)
+        self.assertEqual(other.get_many(['nike', 'adidas']), ({'adidas': 'fresh'}, ['nike']))
+
+
+class ShortCircuitRulesTests(SimpleTestCase):
+    def test_default_rules(self):
+        rules = ShortCircuitRules(DEFAULT_RULES)
+        self.assertEqual(rules.match('$ 14. 99'), 'price')
+        self.assertEqual(rules.match('1,234.5'), 'number')
+        self.assertEqual(rules.match('4.7 out of 5 stars'), 'stars')
+        self.assertEqual(rules.match('Add to Cart'), 'add_to_cart')
+        self.assertIsNone(rules.match('Wireless Headphones'))
+
+    def test_fullmatch_rules_with_own_groups(self):
+        rules = ShortCircuitRules([
+            ('sku', 'fullmatch', r'(?P<prefix>[A-Z]{2})-(\d+)'),
+            ('repeat', 'fullmatch', r'(\w+) \1'),
+            ('number', 'fullmatch', r'\d+'),
+        ])
+        self.assertEqual(rules.match('AB-123'), 'sku')
+        self.assertEqual(rules.match('go go'), 'repeat')
+        self.assertEqual(rules.match('42'), 'number')
+        self.assertIsNone(rules.match('go stop'))
+
+
+class CompactAliasesTests(SimpleTestCase):
+    def test_compaction_keeps_recall(self):
+        words = {1: 'Nike', 2: 'Lego'}
+        aliases = [(10, 1, 'NIKE'), (11, 1, 'Nikes'), (12, 1, 'N1ke'), (13, 1, 'Ｎｉｋｅ'), (14, 2, 'LEGOS'), (15, 2, 'lego')]
+        rows = [(a, w, words[w], text) for a, w, text in aliases]
+        dropped = set(redundant_aliases(rows))
+        self.assertEqual(dropped, {10, 13, 15})
+
+        def matched_words(phrases, text):
+            owner = {words[w]: w for w in words}
+            owner.update((t, w) for a, w, t in aliases)
+            return {owner[p] for p in PhraseAutomaton(phrases).matched_phrases(text)}
+
+        before = list(words.values()) + [t for _, _, t in aliases]
+        after = list(words.values()) + [t for a, _, t in aliases if a not in dropped]
+        for text in ('Nikes耐克运动鞋', '乐高LEGOS积木', 'N1ke鞋', 'ｎｉｋｅ shoes', 'nikes and legos'):
+            self.assertEqual(matched_words(before, text), matched_words(after, text), text)
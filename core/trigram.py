@@ -0,0 +1,142 @@
+"""
+进程内字符 trigram 倒排索引
+
+按分类分区，对快照中的全部启用词条与别名建立 trigram -> 规范化词形下标 的倒排表
+（规范化结果相同的词条/别名共用一个下标），按 token 与候选共享的 trigram 数量取 Top-K，
+作为精确打分前的候选集，完全不访问数据库。
+
+  - 停用 trigram：文档频率超过 max_df 的 trigram 区分度很低，只保留最短的 max_df 个词形，
+    仅在 token 的 trigram 全部为停用 trigram 时使用；posting 总数超过 max_postings 时，
+    继续从最高频的 trigram 开始转为停用；
+  - 查询：按文档频率从低到高累加 trigram 命中数，已有 k 个候选达到最小重合数
+    （token trigram 数 × min_overlap）时不再扫描更高频的 trigram；
+  - 倒排表使用 array('I') 存储，约 4 字节/条。
+"""
+import heapq
+import math
+from array import array
+from collections import Counter, defaultdict
+
+from .normalize import normalize
+
+
+def trigrams(s: str):
+    """首尾补边界符后的字符 trigram 集合（短 token 也至少产生一个 trigram）；s 应已规范化。"""
+    padded = f' {s} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _Partition:
+    __slots__ = ('norms', 'first', 'extra', 'postings', 'stop')
+
+    def __init__(self, entries):
+        # 规范化词形去重：norms[i] 为词形，first[i] 为该词形的第一个条目，extra[i] 为共用该词形的其余条目
+        index = {}
+        first = []
+        extra = {}
+        for e in entries:
+            i = index.setdefault(e.norm, len(first))
+            if i == len(first):
+                first.append(e)
+            else:
+                extra.setdefault(i, []).append(e)
+        self.norms = tuple(index)
+        self.first = first
+        self.extra = extra
+        self.postings = {}
+        self.stop = {}
+
+    def entries(self, i):
+        e = self.first[i]
+        more = self.extra.get(i)
+        return (e, *more) if more else (e,)
+
+
+class TrigramIndex:
+    def __init__(self, entries, max_postings=20_000_000, max_df=10_000, min_overlap=0.5, version=0):
+        # 构建所用的词库版本
+        self.version = version
+        self.min_overlap = float(min_overlap)
+        by_category = {}
+        for e in entries:
+            if e.norm:
+                by_category.setdefault(e.category.lower(), []).append(e)
+
+        self._partitions = {}
+        raw = []
+        for cat, items in by_category.items():
+            part = _Partition(items)
+            postings = defaultdict(list)
+            for i, norm in enumerate(part.norms):
+                padded = f' {norm} '
+                # 与 trigrams() 相同，内联以减少百万级词形构建时的函数调用
+                for g in {padded[j:j + 3] for j in range(len(padded) - 2)}:
+                    postings[g].append(i)
+            self._partitions[cat] = part
+            raw.append((part, postings))
+
+        # 文档频率超过 max_df 的 trigram 转为停用；总量仍超预算时从最高频的 trigram 开始继续转为停用
+        total = sum(len(lst) for _, postings in raw for lst in postings.values())
+        ranked = sorted(
+            ((len(lst), n, g) for n, (_, postings) in enumerate(raw) for g, lst in postings.items()),
+            reverse=True,
+        )
+        stopped = set()
+        for size, n, g in ranked:
+            if size <= max_df and total <= max_postings:
+                break
+            stopped.add((n, g))
+            total -= size
+        self.total_postings = total
+        self.stop_grams = len(stopped)
+
+        for n, (part, postings) in enumerate(raw):
+            lengths = [len(norm) for norm in part.norms]
+            for g, lst in postings.items():
+                if (n, g) in stopped:
+                    part.stop[g] = array('I', sorted(lst, key=lengths.__getitem__)[:max_df])
+                else:
+                    part.postings[g] = array('I', lst)
+
+    def stats(self):
+        return {
+            'partitions': len(self._partitions),
+            'forms': sum(len(p.norms) for p in self._partitions.values()),
+            'postings': self.total_postings,
+            'stop_grams': self.stop_grams,
+        }
+
+    def _top_k(self, part, token: str, grams, k: int):
+        lists = [part.postings[g] for g in grams if g in part.postings]
+        if not lists:
+            # 全部为停用 trigram（如很短或很常见的 token）：仅在其截断的最短词形中取候选
+            lists = [part.stop[g] for g in grams if g in part.stop]
+        if not lists:
+            return []
+        lists.sort(key=len)
+        need = min(len(lists), max(1, math.ceil(len(grams) * self.min_overlap)))
+        counts = Counter()
+        for n, lst in enumerate(lists, 1):
+            counts.update(lst)
+            # 扫描 n 个 trigram 后命中数至多为 n，达到 need 之前无需统计
+            if n >= need:
+                if sum(map(need.__le__, counts.values())) >= k:
+                    break
+        # 先按命中数取第 k 大作为门槛，只对门槛以上的候选按 (命中数, 长度差) 精排
+        floor = heapq.nlargest(k, counts.values())[-1]
+        items = [(i, c) for i, c in counts.items() if c >= floor]
+        norms = part.norms
+        tlen = len(token)
+        best = heapq.nsmallest(k, items, key=lambda kv: (-kv[1], abs(len(norms[kv[0]]) - tlen), kv[0]))
+        return [e for i, _ in best for e in part.entries(i)]
+
+    def top_k(self, token: str, categories, k=100):
+        """返回与 token 共享 trigram 最多的至多 k 个词形对应的条目（各分类分别取 Top-K 后合并）。"""
+        token = normalize(token)
+        grams = trigrams(token)
+        out = []
+        for cat in set((c or '').lower() for c in categories):
+            part = self._partitions.get(cat)
+            if part is not None:
+                out.extend(self._top_k(part, token, grams, k))
+        return out
@@ -20,11 +20,18 @@ urlpatterns = [
     path('api/words/clean_multi', views.clean_text_multi),
     # 新增：批量商品词分类与提取
     path('api/words/clean_multi/batch', views.clean_text_multi_batch),
+    # 大批量清洗后台任务：提交、状态、分页结果
+    path('api/words/clean_multi/jobs', views.clean_jobs),
+    path('api/words/clean_multi/jobs/<int:job_id>', views.clean_job_status),
+    path('api/words/clean_multi/jobs/<int:job_id>/results', views.clean_job_results),
 
 
 
     path('api/analyze-text', views.analyze_text, name='analyze_text'),
 
+    # 运行指标
+    path('api/metrics', views.metrics_view, name='metrics'),
+
     # 新增：积分调整接口
     path('api/points/adjust', views.adjust_points, name='adjust_points'),
 
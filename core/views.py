@@ -1,5 +1,5 @@
 from django.shortcuts import render, redirect
-from django.http import JsonResponse, HttpResponse
+from django.http import JsonResponse, HttpResponse, StreamingHttpResponse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.models import User
 from django.contrib.auth.decorators import login_required
@@ -7,18 +7,45 @@ from django.conf import settings
 from django.views.decorators.csrf import csrf_exempt
 from django.db import models
 from .models import Profile, Product, Order, UserInfo, Category, Word, WordAlias, WordLog, StoreKey, PointsBalance, UsageLog, Suggestion, Trial
+from .models import bump_lexicon_version, CleanJob, CleanJobItem
+from .fts import lookup_candidates, sync_category, sync_word, sync_alias
+from .hitlog import log_word_hits
+from .normalize import normalize
+from . import http_client, llm_async, metrics, similarity, single_flight
+from .cache import LRUCache, TokenCache
+from .lexicon import get_snapshot, get_category_automaton, remove_phrases_reference, load_category_phrases
+from .lexicon import get_boundary_matcher, boundary_matcher_stats
+from .deepseek import api_url as deepseek_api_url, extract_brands, extract_brands_many, first_synonym_hits
+from .llm_cache import get_brand_cache, get_synonym_cache
+from .circuit_breaker import get_deepseek_breaker
+from .worker_pool import get_batch_pool
+from .jobs import job_progress, submit_job
+from .short_circuit import get_short_circuit_rules
+import logging
 import random
 import string
+import time
 import json
 import os
-import difflib
 import requests
 from aliyun_sms import SMS
 from dotenv import load_dotenv
 load_dotenv()
+logger = logging.getLogger(__name__)
 # 简单的内存存储验证码，生产使用请改为缓存/Redis
 SMS_CODE_STORE = {}
 
+# 进程级 token 结果缓存（批量清洗接口跨请求复用，键中含词库版本）
+_TOKEN_LRU = LRUCache(getattr(settings, 'TOKEN_CACHE_SIZE', 50000))
+metrics.register('token_cache', _TOKEN_LRU.stats)
+metrics.register('boundary_matchers', boundary_matcher_stats)
+metrics.register('synonym_cache', lambda: get_synonym_cache().stats())
+metrics.register('brand_cache', lambda: get_brand_cache().stats())
+metrics.register('llm_async', llm_async.stats)
+metrics.register('single_flight', single_flight.stats)
+metrics.register('deepseek_breaker', lambda: get_deepseek_breaker().stats())
+metrics.register('batch_pool', lambda: get_batch_pool().stats())
+
 # 轻量缓存：品牌识别模型（按 artifacts 路径与配置缓存）
 _BRAND_MODEL_CACHE = {}
 # 默认模型根目录（可自动在其中查找含 metadata.json 的子目录）
@@ -156,7 +183,7 @@ def words_classification(request):
             'Content-Type': 'application/json',
         }
         try:
-            resp = requests.post('https://api.deepseek.com/beta/chat/completions',
+            resp = http_client.post(deepseek_api_url('beta/chat/completions'),
                                     headers=headers, json=payload, timeout=10)
             if resp.ok:
                 rj = resp.json()
@@ -446,6 +473,9 @@ def categories(request):
         if obj_id:
             Category.objects.filter(id=obj_id).update(**fields)
             obj = Category.objects.get(id=obj_id)
+            # queryset.update 不触发 post_save，手动同步候选索引与词库版本
+            sync_category(obj)
+            bump_lexicon_version()
         else:
             obj = Category.objects.create(**fields)
         return JsonResponse({'code': 0, 'msg': 'ok', 'data': category_mapper(obj)})
@@ -485,6 +515,9 @@ def words(request):
         if obj_id:
             Word.objects.filter(id=obj_id).update(**fields)
             obj = Word.objects.select_related('category').get(id=obj_id)
+            # queryset.update 不触发 post_save，手动同步候选索引与词库版本
+            sync_word(obj)
+            bump_lexicon_version()
         else:
             obj = Word.objects.create(**fields)
         return JsonResponse({'code': 0, 'msg': 'ok', 'data': word_std_mapper(obj)})
@@ -522,6 +555,9 @@ def word_aliases(request):
         if obj_id:
             WordAlias.objects.filter(id=obj_id).update(**fields)
             obj = WordAlias.objects.get(id=obj_id)
+            # queryset.update 不触发 post_save，手动同步候选索引与词库版本
+            sync_alias(obj)
+            bump_lexicon_version()
         else:
             obj = WordAlias.objects.create(**fields)
         return JsonResponse({'code': 0, 'msg': 'ok', 'data': word_alias_mapper(obj)})
@@ -588,31 +624,16 @@ def analyze_text(request):
         if cat_name not in hits:
             hits[cat_name] = []
 
-    # 1) 直接匹配 Word 中的短语出现在原文本
-    word_qs = Word.objects.select_related('category').filter(is_active=True)
-    for w in word_qs:
-        phrase = w.word
-        if not phrase:
-            continue
-        p = phrase.lower()
-        if p in text.lower() or any(p in tok for tok in tokens):
-            cat = w.category.name if w.category else 'unknown'
-            ensure_cat(cat)
-            hits[cat].append(phrase)
-            WordLog.objects.create(word=w, context=text[:500])
-
-    # 2) 匹配别名别称出现在原文本
-    alias_qs = WordAlias.objects.select_related('word__category').all()
-    for a in alias_qs:
-        alias = (a.alias or '').lower()
-        if not alias:
-            continue
-        if alias in text.lower() or any(alias in tok for tok in tokens):
-            w = a.word
-            cat = w.category.name if w and w.category else 'unknown'
-            ensure_cat(cat)
-            hits[cat].append(w.word)
-            WordLog.objects.create(word=w, context=text[:500])
+    # 基于内存词库快照的预编译自动机：单次扫描找出原文本中出现的全部词条与别名
+    snapshot = get_snapshot()
+    hit_word_ids = []
+    for e in snapshot.match_entries(text):
+        cat = e.category
+        ensure_cat(cat)
+        hits[cat].append(e.word)
+        hit_word_ids.append(e.word_id)
+    # 命中记录写入缓冲区，由后台线程批量落库
+    log_word_hits(hit_word_ids, text[:500])
 
     # 去重与排序
     for cat in list(hits.keys()):
@@ -632,7 +653,7 @@ def analyze_text(request):
     counts = {k: len(v) for k, v in summary.items()}
 
     # 返回 category 显示名（description）映射，便于前端友好展示
-    cat_display = {c.name: c.description for c in Category.objects.all()}
+    cat_display = dict(snapshot.categories)
 
     return JsonResponse({'code': 0, 'msg': 'ok', 'data': {
         'hits': summary,
@@ -683,95 +704,6 @@ def image_is_watermark(request):
     return JsonResponse({'code': 0, 'msg': 'ok', 'data': {'watermark_images': watermark_urls, 'errors': errors}})
 
 
-@csrf_exempt
-def rm_brand(request):
-    """
-    POST /api/words/rm_brand
-    body: {"text": "..."}
-
-    逻辑：将文本中出现的【品牌词库】(Category.name == 'brand') 的词条及其别名替换为''直接删除。
-    大小写不敏感，按子串直接移除（中英文统一处理）。
-    返回清洗后的文本和被移除的词列表。
-    """
-    if request.method != 'POST':
-        return JsonResponse({'code': 405, 'msg': 'Method Not Allowed'})
-
-    data = parse_json(request)
-    text = (data.get('text') or '')
-    if not text.strip():
-        return JsonResponse({'code': 400, 'msg': 'text不能为空'})
-
-    # 收集品牌词与别名
-    phrases = []
-    brand_words = Word.objects.select_related('category').filter(is_active=True, category__name__iexact='brand')
-    phrases.extend([w.word for w in brand_words if (w.word or '').strip()])
-    brand_aliases = WordAlias.objects.select_related('word__category').filter(word__category__name__iexact='brand')
-    phrases.extend([a.alias for a in brand_aliases if (a.alias or '').strip()])
-
-    # 去重并按长度降序，避免较短词先删造成重叠影响
-    uniq_phrases = sorted(set(p.strip() for p in phrases if p), key=lambda s: (-len(s), s.lower()))
-
-    import re
-    cleaned = text
-    removed = []
-    for p in uniq_phrases:
-        if not p:
-            continue
-        pattern = re.compile(re.escape(p), flags=re.IGNORECASE)
-        if pattern.search(cleaned):
-            cleaned = pattern.sub('', cleaned)
-            removed.append(p)
-
-    return JsonResponse({'code': 0, 'msg': 'ok', 'data': {
-        'cleaned_text': cleaned,
-        'removed': sorted(set(removed), key=lambda s: (-len(s), s.lower()))
-    }})
-
-@csrf_exempt
-def rm_forbiden(request):
-    """
-    POST /api/words/rm_forbiden
-    body: {"text": "..."}
-    
-    逻辑：将文本中出现的【违禁词库】(Category.name == 'forbidden') 的词条及其别名替换为''直接删除。
-    大小写不敏感，按子串直接移除（中英文统一处理）。
-    返回清洗后的文本和被移除的词列表。
-    """
-    if request.method != 'POST':
-        return JsonResponse({'code': 405, 'msg': 'Method Not Allowed'})
-
-    data = parse_json(request)
-    text = (data.get('text') or '')
-    if not text.strip():
-        return JsonResponse({'code': 400, 'msg': 'text不能为空'})
-
-    # 收集违禁词与别名
-    phrases = []
-    forbidden_words = Word.objects.select_related('category').filter(is_active=True, category__name__iexact='forbidden')
-    phrases.extend([w.word for w in forbidden_words if (w.word or '').strip()])
-    forbidden_aliases = WordAlias.objects.select_related('word__category').filter(word__category__name__iexact='forbidden')
-    phrases.extend([a.alias for a in forbidden_aliases if (a.alias or '').strip()])
-
-    # 去重并按长度降序，避免较短词先删造成重叠影响
-    uniq_phrases = sorted(set(p.strip() for p in phrases if p), key=lambda s: (-len(s), s.lower()))
-
-    import re
-    cleaned = text
-    removed = []
-    for p in uniq_phrases:
-        # 忽略空
-        if not p:
-            continue
-        # 构建不区分大小写的安全替换（转义正则特殊符号）
-        pattern = re.compile(re.escape(p), flags=re.IGNORECASE)
-        if pattern.search(cleaned):
-            cleaned = pattern.sub('', cleaned)
-            removed.append(p)
-
-    return JsonResponse({'code': 0, 'msg': 'ok', 'data': {
-        'cleaned_text': cleaned,
-        'removed': sorted(set(removed), key=lambda s: (-len(s), s.lower()))
-    }})
 def send_code(request):
     phone = request.GET.get('phone')
     if not phone:
@@ -877,13 +809,23 @@ def super_settings(request):
     })
 
 
+def _remove_category_phrases(text: str, category_name: str):
+    """
+    删除文本中出现的某分类词条及其别名，返回 (清洗后文本, 被移除的词列表)。
+    默认使用预编译自动机单次扫描（最左最长）；LEXICON_MATCHER=reference 时回退为逐词正则替换。
+    """
+    if getattr(settings, 'LEXICON_MATCHER', 'automaton') == 'reference':
+        return remove_phrases_reference(text, load_category_phrases(category_name))
+    return get_category_automaton(category_name).remove(text)
+
+
 def rm_brand(request):
     """
     POST /api/words/rm_brand
     body: {"text": "..."}
 
     逻辑：将文本中出现的【品牌词库】(Category.name == 'brand') 的词条及其别名替换为''直接删除。
-    大小写不敏感，按子串直接移除（中英文统一处理）。
+    大小写不敏感，按子串直接移除（中英文统一处理），重叠时按最左最长命中删除。
     返回清洗后的文本和被移除的词列表。
     """
     if request.method != 'POST':
@@ -894,26 +836,7 @@ def rm_brand(request):
     if not text.strip():
         return JsonResponse({'code': 400, 'msg': 'text不能为空'})
 
-    # 收集品牌词与别名
-    phrases = []
-    brand_words = Word.objects.select_related('category').filter(is_active=True, category__name__iexact='brand')
-    phrases.extend([w.word for w in brand_words if (w.word or '').strip()])
-    brand_aliases = WordAlias.objects.select_related('word__category').filter(word__category__name__iexact='brand')
-    phrases.extend([a.alias for a in brand_aliases if (a.alias or '').strip()])
-
-    # 去重并按长度降序，避免较短词先删造成重叠影响
-    uniq_phrases = sorted(set(p.strip() for p in phrases if p), key=lambda s: (-len(s), s.lower()))
-
-    import re
-    cleaned = text
-    removed = []
-    for p in uniq_phrases:
-        if not p:
-            continue
-        pattern = re.compile(re.escape(p), flags=re.IGNORECASE)
-        if pattern.search(cleaned):
-            cleaned = pattern.sub('', cleaned)
-            removed.append(p)
+    cleaned, removed = _remove_category_phrases(text, 'brand')
 
     return JsonResponse({'code': 0, 'msg': 'ok', 'data': {
         'cleaned_text': cleaned,
@@ -927,7 +850,7 @@ def rm_forbiden(request):
     body: {"text": "..."}
     
     逻辑：将文本中出现的【违禁词库】(Category.name == 'forbidden') 的词条及其别名替换为''直接删除。
-    大小写不敏感，按子串直接移除（中英文统一处理）。
+    大小写不敏感，按子串直接移除（中英文统一处理），重叠时按最左最长命中删除。
     返回清洗后的文本和被移除的词列表。
     """
     if request.method != 'POST':
@@ -938,28 +861,7 @@ def rm_forbiden(request):
     if not text.strip():
         return JsonResponse({'code': 400, 'msg': 'text不能为空'})
 
-    # 收集违禁词与别名
-    phrases = []
-    forbidden_words = Word.objects.select_related('category').filter(is_active=True, category__name__iexact='forbidden')
-    phrases.extend([w.word for w in forbidden_words if (w.word or '').strip()])
-    forbidden_aliases = WordAlias.objects.select_related('word__category').filter(word__category__name__iexact='forbidden')
-    phrases.extend([a.alias for a in forbidden_aliases if (a.alias or '').strip()])
-
-    # 去重并按长度降序，避免较短词先删造成重叠影响
-    uniq_phrases = sorted(set(p.strip() for p in phrases if p), key=lambda s: (-len(s), s.lower()))
-
-    import re
-    cleaned = text
-    removed = []
-    for p in uniq_phrases:
-        # 忽略空
-        if not p:
-            continue
-        # 构建不区分大小写的安全替换（转义正则特殊符号）
-        pattern = re.compile(re.escape(p), flags=re.IGNORECASE)
-        if pattern.search(cleaned):
-            cleaned = pattern.sub('', cleaned)
-            removed.append(p)
+    cleaned, removed = _remove_category_phrases(text, 'forbidden')
 
     return JsonResponse({'code': 0, 'msg': 'ok', 'data': {
         'cleaned_text': cleaned,
@@ -967,6 +869,81 @@ def rm_forbiden(request):
     }})
 
 
+def _candidate_pool(tokens, categories):
+    """一次性取回全部 token 的词库候选：{token: [LexiconEntry]}，检索方式见 _versioned_candidate_pool。"""
+    return _versioned_candidate_pool(tokens, categories)[0]
+
+
+def _versioned_candidate_pool(tokens, categories):
+    """
+    返回 ({token: [LexiconEntry]}, 候选所来自的词库版本)。
+    LEXICON_CANDIDATES：
+      fts      查询 FTS5 trigram 索引（默认，每段文本一次查询）；
+      trigram  内存 trigram 倒排索引，按 trigram 重合度取 Top-K，不访问数据库；
+               索引在后台构建，构建完成前使用上一版本词库的索引（返回的版本即该索引的版本），
+               进程内尚无可用索引时按 fts 检索；
+      snapshot 扫描内存快照做子串匹配（索引不可用时的回退）。
+    """
+    mode = getattr(settings, 'LEXICON_CANDIDATES', 'fts')
+    snapshot = get_snapshot()
+    if mode == 'trigram':
+        index = snapshot.trigram_index()
+        if index is not None:
+            top_k = getattr(settings, 'TRIGRAM_TOP_K', 100)
+            return {t: index.top_k(t, categories, top_k) for t in set(tokens)}, index.version
+        metrics.incr('trigram_index.not_ready')
+        mode = 'fts'
+    pool = None
+    if mode == 'fts':
+        pool = lookup_candidates(tokens, categories)
+    if pool is None:
+        entries = snapshot.entries_for(categories)
+        pool = {}
+        for t in set(tokens):
+            n = normalize(t)
+            taken = {}
+            hits = []
+            for e in entries:
+                key = (e.category.lower(), e.is_alias)
+                if n and n in e.norm and taken.get(key, 0) < 300:
+                    taken[key] = taken.get(key, 0) + 1
+                    hits.append(e)
+            pool[t] = hits
+    return pool, snapshot.version
+
+
+def _score_fuzzy_candidates(token: str, entries, categories):
+    """对 token 的候选打分，返回得分最高的 [(phrase, category, score)]。"""
+    cats = set(c.lower() for c in categories)
+    picked = []
+    taken = {False: 0, True: 0}
+    t = normalize(token)
+    for e in entries:
+        if e.category.lower() not in cats or taken[e.is_alias] >= 200:
+            continue
+        taken[e.is_alias] += 1
+        picked.append(e)
+    # 低于 0.6 的候选不会触发删除，打分时提前淘汰
+    scores = similarity.ratios(t, [e.norm for e in picked], cutoff=0.6)
+    cands = [(e.text, e.category.lower(), score) for e, score in zip(picked, scores)]
+    # 选取得分较高的前若干个
+    cands.sort(key=lambda x: (-x[2], -len(x[0]), x[0].lower()))
+    return cands[:5]
+
+
+def _score_best_keyword(token: str, entries):
+    """在 keyword 分类候选中找与 token 最相近的词条/别名，得分不足 0.6 返回 None。"""
+    t = normalize(token)
+    keywords = [e for e in entries if e.category.lower() == 'keyword']
+    scores = similarity.ratios(t, [e.norm for e in keywords], cutoff=0.6)
+    cands = [(e.text, score) for e, score in zip(keywords, scores)]
+    if not cands:
+        return None
+    cands.sort(key=lambda x: (-x[1], -len(x[0]), x[0].lower()))
+    best = cands[0]
+    return best if best[1] >= 0.6 else None
+
+
 @csrf_exempt
 def clean_text_multi(request):
     """
@@ -1014,209 +991,53 @@ def clean_text_multi(request):
     # 分词：按非字母数字与撇号拆分，保留较有意义的 token（长度>=2）
     tokens = [t.lower() for t in re.split(r"[^A-Za-z0-9']+", text) if len(t) >= 2]
     uniq_tokens = sorted(set(tokens))
+    # 全部 token 的词库候选一次取回（FTS5 trigram 索引）
+    candidate_pool = _candidate_pool(uniq_tokens, req_categories)
 
-    # DeepSeek API（OpenAI兼容）判断同义助手
-    DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY', '')
-    def _is_synonym(a: str, b: str) -> bool:
-        # 若未配置密钥，降级为严格相似度判断
-        a1 = (a or '').strip().lower()
-        b1 = (b or '').strip().lower()
-        if not a1 or not b1:
-            return False
-        # 先用本地相似度快速过滤，避免无意义调用
-        ratio = difflib.SequenceMatcher(None, a1, b1).ratio()
-        if ratio >= 0.92:
-            return True
-        if not DEEPSEEK_API_KEY:
-            return False
-        try:
-            payload = {
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "system", "content": "You are a strict synonym/equivalence checker. Reply only 'yes' or 'no'."},
-                    {"role": "user", "content": f"Are '{a1}' and '{b1}' synonyms or representing the same brand/company/product? Answer yes or no."}
-                ],
-                "stream": False
-            }
-            headers = {
-                "Authorization": f"Bearer {DEEPSEEK_API_KEY}",
-                "Content-Type": "application/json"
-            }
-            resp = requests.post("https://api.deepseek.com/chat/completions", json=payload, headers=headers, timeout=6)
-            if resp.status_code == 200:
-                jr = resp.json()
-                content = str(jr.get('choices', [{}])[0].get('message', {}).get('content', '')).strip().lower()
-                return content.startswith('y') or ('yes' in content)
-        except Exception:
-            # 网络或API错误时，不判定为同义
-            return False
-        return False
+    # 同义判断见 core.deepseek.verify_synonyms（批量请求，带两级结果缓存）
 
     # 模糊搜索候选（按 token 局部匹配），返回 [(phrase, category, score)]
     def _fuzzy_candidates(token: str):
-        cands = []
-        # 词条
-        w_qs = Word.objects.select_related('category').filter(
-            is_active=True,
-            category__name__in=req_categories,
-            word__icontains=token
-        )[:200]
-        for w in w_qs:
-            s = (w.word or '').strip()
-            if not s:
-                continue
-            score = difflib.SequenceMatcher(None, token.lower(), s.lower()).ratio()
-            cands.append((s, w.category.name.lower(), score))
-        # 别名
-        a_qs = WordAlias.objects.select_related('word__category').filter(
-            word__category__name__in=req_categories,
-            alias__icontains=token
-        )[:200]
-        for a in a_qs:
-            s = (a.alias or '').strip()
-            if not s:
-                continue
-            score = difflib.SequenceMatcher(None, token.lower(), s.lower()).ratio()
-            cands.append((s, a.word.category.name.lower(), score))
-        # 选取得分较高的前若干个
-        cands.sort(key=lambda x: (-x[2], -len(x[0]), x[0].lower()))
-        return cands[:5]
+        return _score_fuzzy_candidates(token, candidate_pool.get(token, ()), req_categories)
 
     cleaned = text
     removed_tokens = []
     removed_by_category = {c: [] for c in req_categories}
 
-    # 对每个 token：模糊搜索候选→DeepSeek判断同义→同义则删除该 token（按词边界）
-    for tk in uniq_tokens:
-        candidates = _fuzzy_candidates(tk)
-        # 仅当存在较相关候选时才尝试判断
-        if not candidates:
-            continue
-        # 若任一候选与该token同义/等价，则删除该token
-        synonym_hit = None
-        for phrase, cat, score in candidates:
-            # 先做分数门槛（避免过低匹配触发API）
-            if score < 0.6:
-                continue
-            # 仅对 forbidden 执行删除（品牌改为通过 DeepSeek 整体识别后统一删除）
-            if cat in ('forbidden',) and _is_synonym(tk, phrase):
-                synonym_hit = (phrase, cat)
-                break
-        if synonym_hit:
-            pattern = re.compile(rf"\b{re.escape(tk)}\b", flags=re.IGNORECASE)
-            if pattern.search(cleaned):
-                cleaned = pattern.sub('', cleaned)
-                removed_tokens.append(tk)
-                cat = synonym_hit[1]
-                removed_by_category.setdefault(cat, [])
-                removed_by_category[cat].append(tk)
+    # 两阶段：先汇总全部 token 的待判断候选（分数门槛避免过低匹配触发API；
+    # 仅对 forbidden 执行删除，品牌改为通过 DeepSeek 整体识别后统一删除），批量判断同义后，
+    # 同义则删除该 token（按词边界，命中 token 汇总后一次扫描删除）
+    forbidden_hits = first_synonym_hits({
+        tk: [phrase for phrase, cat, score in _fuzzy_candidates(tk) if score >= 0.6 and cat in ('forbidden',)]
+        for tk in uniq_tokens
+    })
+    synonym_hits = {tk: 'forbidden' for tk in uniq_tokens if forbidden_hits.get(tk)}
+    if synonym_hits:
+        cleaned, spans = get_boundary_matcher(synonym_hits).remove(cleaned)
+        for tk in sorted({phrase for _, _, phrase in spans}, key=lambda s: (-len(s), s.lower())):
+            removed_tokens.append(tk)
+            removed_by_category.setdefault(synonym_hits[tk], [])
+            removed_by_category[synonym_hits[tk]].append(tk)
 
     # 品牌词：调用 DeepSeek API 从整段文本中抽取品牌词，并统一从原文本中移除
     def _extract_brands_with_deepseek(full_text: str):
-        api_key = os.getenv('DEEPSEEK_API_KEY', '')
-        if not api_key or not (full_text or '').strip():
-            return []
-        try:
-            payload = {
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "system", "content": "你是一个严格的品牌词抽取器。必须100%确认是品牌词才能提取，宁可漏判不可误判。，返回JSON数组。"},
-                    {"role": "user", "content": (
-                           "请从下面文本中找出品牌词，规则：\n"
-                            "1) 排除规则（以下情况绝对不是品牌词）：\n"
-                            "   - 通用产品名称（如 knife, tool, drill, machine 等）\n"
-                            "   - 产品特性描述（如 rainbow, cute, small, legal 等）\n"
-                            "   - 产品用途描述（如 self defense, camping, EDC 等）\n"
-                            "   - 含数字的型号代码（如 6655 R）\n"
-                            "   - 目标人群（如 women, womens）\n"
-                            "   - 节日/场合（如 birthday, gifts）\n"
-                            "\n"
-                            "2) 品牌词特征（符合1个及以上即可判断为品牌词）：\n"
-                            "   - 专有名词，不是普通英文单词\n"
-                            "   - 在商业语境中常作为品牌或卖家名出现\n"
-                            "   - 无法自然直译成中文\n"
-                            "   - 不包含产品功能描述\n"
-                            "   - 一般首字母大写的单词或全部大写的单词\n"
-                            "   - 拼写看似不规范，或不是常见英文词汇\n"
-                            "\n"
-                            "3) 判断标准：\n"
-                            "   - 如果一个词既不是常见英文单词，又不是常见产品通用词，那么优先作为品牌词保留\n"
-                            "   - 即使不是国际知名品牌，也要提取出来（例如小众品牌、店铺品牌）\n"
-                            "   - 如果完全无法判断，可以标注为【可能是品牌词】并输出\n"
-                            "4) 输出格式：严格返回JSON：{\"brands\": [\"brand1\", \"brand2\"]}，如果没有品牌词就返回空数组"
-                            f"文本：{full_text}"
-                    )}
-                ],
-                "stream": False
-            }
-            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-            resp = requests.post("https://api.deepseek.com/chat/completions", json=payload, headers=headers, timeout=8)
-            if resp.status_code != 200:
-                return []
-            jr = resp.json()
-            content = str(jr.get('choices', [{}])[0].get('message', {}).get('content', '')).strip()
-            import json as _json
-            brands = []
-            try:
-                obj = _json.loads(content)
-                if isinstance(obj, dict) and isinstance(obj.get('brands'), list):
-                    brands = [str(x).strip() for x in obj.get('brands') if str(x).strip()]
-                elif isinstance(obj, list):
-                    brands = [str(x).strip() for x in obj if str(x).strip()]
-            except Exception:
-                # 宽松解析：逗号/换行分隔
-                parts = [p.strip() for p in re.split(r"[,]", content) if p.strip()]
-                brands = parts
-            # 过滤掉全数字/主要为数字的项
-            def _is_mostly_digits(s: str):
-                digits = sum(ch.isdigit() for ch in s)
-                return digits >= max(3, len(s) * 0.6)
-            brands = [b for b in brands if len(b) >= 2 and not _is_mostly_digits(b)]
-            return brands
-        except Exception:
-            return []
+        return extract_brands(full_text, prompt='full')
 
     if 'brand' in req_categories:
         brands = _extract_brands_with_deepseek(text)
         if brands:
-            # 按长度降序移除，避免子串影响
-            phrases = sorted(set(b for b in brands if b), key=lambda s: (-len(s.strip()), s.lower()))
-            for p in phrases:
-                if not p:
-                    continue
-                # 使用词边界匹配，避免删除非品牌词的子串（如 Pineapple 中的 apple）
-                pattern = re.compile(rf"\b{re.escape(p)}\b", flags=re.IGNORECASE)
-                if pattern.search(cleaned):
-                    cleaned = pattern.sub('', cleaned)
-                    removed_tokens.append(p)
-                    removed_by_category.setdefault('brand', [])
-                    removed_by_category['brand'].append(p)
+            # 组合正则一次扫描移除，长度降序优先，词边界避免删除非品牌词的子串（如 Pineapple 中的 apple）
+            cleaned, spans = get_boundary_matcher(brands).remove(cleaned)
+            for p in sorted({phrase for _, _, phrase in spans}, key=lambda s: (-len(s), s.lower())):
+                removed_tokens.append(p)
+                removed_by_category.setdefault('brand', [])
+                removed_by_category['brand'].append(p)
 
     # 关键词：基于分词在 keyword 类别中模糊搜索最相关词并追加到文本末尾
     appended_keywords = []
 
     def _best_keyword_for_token(token: str):
-        cands = []
-        # 仅在 keyword 分类中查找
-        w_qs = Word.objects.select_related('category').filter(
-            is_active=True, category__name__iexact='keyword', word__icontains=token
-        )[:300]
-        for w in w_qs:
-            s = (w.word or '').strip()
-            if s:
-                cands.append((s, difflib.SequenceMatcher(None, token.lower(), s.lower()).ratio()))
-        a_qs = WordAlias.objects.select_related('word__category').filter(
-            word__category__name__iexact='keyword', alias__icontains=token
-        )[:300]
-        for a in a_qs:
-            s = (a.alias or '').strip()
-            if s:
-                cands.append((s, difflib.SequenceMatcher(None, token.lower(), s.lower()).ratio()))
-        if not cands:
-            return None
-        cands.sort(key=lambda x: (-x[1], -len(x[0]), x[0].lower()))
-        best = cands[0]
-        return best if best[1] >= 0.6 else None
+        return _score_best_keyword(token, candidate_pool.get(token, ()))
 
     # 仅对未被删除的 token 做关键词追加，降低噪声
     tokens_for_keywords = [t for t in uniq_tokens if t not in set(removed_tokens)]
@@ -1233,10 +1054,13 @@ def clean_text_multi(request):
 
     # 新增：在程序末尾确保 hotwords 中每个词都包含在 cleaned 中
     if hotwords:
-        for w in [x for x in hotwords.split(' ') if x.strip()]:
-            # 用词边界判断是否已存在，避免子串误判
-            if not re.search(rf"\b{re.escape(w)}\b", cleaned, flags=re.IGNORECASE):
+        hotword_list = [x for x in hotwords.split(' ') if x.strip()]
+        # 用词边界判断是否已存在，避免子串误判；全部 hotwords 一次扫描
+        present = {w.lower() for w in get_boundary_matcher(hotword_list).found(cleaned)}
+        for w in hotword_list:
+            if w.lower() not in present:
                 cleaned = (cleaned.rstrip() + (' ' if cleaned and not cleaned.endswith(' ') else '') + w)
+                present.add(w.lower())
 
     # 去重与排序清理
     removed_tokens = sorted(set(removed_tokens), key=lambda s: (-len(s), s.lower()))
@@ -1261,155 +1085,61 @@ def clean_text_multi(request):
 def privacy(request):
     return render(request, 'privacy.html')
 
-@csrf_exempt
-def clean_text_multi_batch(request):
-    """
-    POST /api/words/clean_multi/batch
-    body: {
-      "texts": ["...", "..."],
-      "categories": ["forbidden","brand","keyword"],
-      "hotwords": ""  # 可选，若非空则不追加 keyword 类别
-    }
-    返回：{code, msg, data: {result: {原text: 修改后的text}}}
-    若修改后为空字符串则返回空字符串。
-    """
-    if request.method != 'POST':
-        return JsonResponse({'code': 405, 'msg': 'Method Not Allowed'})
-
-    data = parse_json(request)
-    texts = data.get('texts') or data.get('text_list') or []
-    if not isinstance(texts, list) or len(texts) == 0:
-        return JsonResponse({'code': 400, 'msg': 'texts必须为非空列表'})
-
+def _batch_options(data):
+    """解析批量清洗参数，返回 (分类列表, hotwords 列表)；hotwords 非空时不执行 keyword 类别。"""
     categories_param = data.get('categories') or ['forbidden', 'brand', 'keyword']
     req_categories = [str(c).strip().lower() for c in categories_param if str(c).strip()]
     hotwords_global = str(data.get('hotwords', '') or '').strip()
+    hotword_list = [x for x in hotwords_global.split(' ') if x.strip()]
     if hotwords_global:
         req_categories = [c for c in req_categories if c != 'keyword']
+    return req_categories, hotword_list
 
-    import re, difflib, os, requests
-    from concurrent.futures import ThreadPoolExecutor, as_completed
-
-    DEEPSEEK_API_KEY = os.getenv('DEEPSEEK_API_KEY', '')
-
-    def _is_synonym(a: str, b: str) -> bool:
-        a1 = (a or '').strip().lower()
-        b1 = (b or '').strip().lower()
-        if not a1 or not b1:
-            return False
-        ratio = difflib.SequenceMatcher(None, a1, b1).ratio()
-        if ratio >= 0.92:
-            return True
-        if not DEEPSEEK_API_KEY:
-            return False
-        try:
-            payload = {
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "system", "content": "You are a strict synonym/equivalence checker. Reply only 'yes' or 'no'."},
-                    {"role": "user", "content": f"Are '{a1}' and '{b1}' synonyms or representing the same brand/company/product? Answer yes or no."}
-                ],
-                "stream": False
-            }
-            headers = {"Authorization": f"Bearer {DEEPSEEK_API_KEY}", "Content-Type": "application/json"}
-            resp = requests.post("https://api.deepseek.com/chat/completions", json=payload, headers=headers, timeout=6)
-            if resp.status_code == 200:
-                jr = resp.json()
-                content = str(jr.get('choices', [{}])[0].get('message', {}).get('content', '')).strip().lower()
-                return content.startswith('y') or ('yes' in content)
-        except Exception:
-            return False
-        return False
 
-    def _fuzzy_candidates(token: str):
-        cands = []
-        w_qs = Word.objects.select_related('category').filter(
-            is_active=True,
-            category__name__in=req_categories,
-            word__icontains=token
-        )[:200]
-        for w in w_qs:
-            s = (w.word or '').strip()
-            if not s:
-                continue
-            score = difflib.SequenceMatcher(None, token.lower(), s.lower()).ratio()
-            cands.append((s, w.category.name.lower(), score))
-        a_qs = WordAlias.objects.select_related('word__category').filter(
-            word__category__name__in=req_categories,
-            alias__icontains=token
-        )[:200]
-        for a in a_qs:
-            s = (a.alias or '').strip()
-            if not s:
-                continue
-            score = difflib.SequenceMatcher(None, token.lower(), s.lower()).ratio()
-            cands.append((s, a.word.category.name.lower(), score))
-        cands.sort(key=lambda x: (-x[2], -len(x[0]), x[0].lower()))
-        return cands[:5]
+def _dedup_texts(texts):
+    """
+    相同文本只处理一次：按去除首尾空白后的文本去重（首尾空白不影响清洗结果）。
+    返回 (每条文本的去重键, {去重键: 首次出现的原文})，结果按键回填即可保持原顺序。
+    """
+    dedup_keys = [t.strip() if isinstance(t, str) else ('#', i) for i, t in enumerate(texts)]
+    distinct = {}
+    for key, t in zip(dedup_keys, texts):
+        distinct.setdefault(key, t)
+    return dedup_keys, distinct
 
-    def _extract_brands_with_deepseek(full_text: str):
-        api_key = DEEPSEEK_API_KEY
-        if not api_key or not (full_text or '').strip():
-            return []
-        try:
-            payload = {
-                "model": "deepseek-chat",
-                "messages": [
-                    {"role": "system", "content": "你是一个严格的品牌词抽取器。必须100%确认是品牌词才能提取，宁可漏判不可误判。返回JSON数组。"},
-                    {"role": "user", "content": (
-                        "请从下面文本中找出品牌词，严格排除通用产品词/功能词/型号/节日等。"
-                        "输出格式：{\"brands\": [\"brand1\", \"brand2\"]}。"
-                        f"文本：{full_text}"
-                    )}
-                ],
-                "stream": False
-            }
-            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
-            resp = requests.post("https://api.deepseek.com/chat/completions", json=payload, headers=headers, timeout=8)
-            if resp.status_code != 200:
-                return []
-            jr = resp.json()
-            content = str(jr.get('choices', [{}])[0].get('message', {}).get('content', '')).strip()
-            import json as _json
-            brands = []
-            try:
-                obj = _json.loads(content)
-                if isinstance(obj, dict) and isinstance(obj.get('brands'), list):
-                    brands = [str(x).strip() for x in obj.get('brands') if str(x).strip()]
-                elif isinstance(obj, list):
-                    brands = [str(x).strip() for x in obj if str(x).strip()]
-            except Exception:
-                parts = [p.strip() for p in re.split(r"[,\n]", content) if p.strip()]
-                brands = parts
-            def _is_mostly_digits(s: str):
-                digits = sum(ch.isdigit() for ch in s)
-                return digits >= max(3, len(s) * 0.6)
-            brands = [b for b in brands if len(b) >= 2 and not _is_mostly_digits(b)]
-            return brands
-        except Exception:
-            return []
 
-    def _best_keyword_for_token(token: str):
-        cands = []
-        w_qs = Word.objects.select_related('category').filter(
-            is_active=True, category__name__iexact='keyword', word__icontains=token
-        )[:300]
-        for w in w_qs:
-            s = (w.word or '').strip()
-            if s:
-                cands.append((s, difflib.SequenceMatcher(None, token.lower(), s.lower()).ratio()))
-        a_qs = WordAlias.objects.select_related('word__category').filter(
-            word__category__name__iexact='keyword', alias__icontains=token
-        )[:300]
-        for a in a_qs:
-            s = (a.alias or '').strip()
-            if s:
-                cands.append((s, difflib.SequenceMatcher(None, token.lower(), s.lower()).ratio()))
-        if not cands:
-            return None
-        cands.sort(key=lambda x: (-x[1], -len(x[0]), x[0].lower()))
-        best = cands[0]
-        return best if best[1] >= 0.6 else None
+def _build_batch_cleaner(texts, req_categories, hotword_list, deadline=None):
+    """
+    批量清洗管线（clean_multi/batch 接口与 clean_worker 后台任务共用）。
+    对 texts 整体完成 LLM 阶段（品牌词批量抽取、违禁词批量同义判断）后，
+    返回 (process_one, token_cache)：process_one(text) 为逐条清洗函数，可在工作线程中并发调用。
+    deadline 为 LLM 阶段的绝对截止时刻（llm_async.deadline_after），品牌词与同义判断各轮请求共用；
+    未传入时自调用起 LLM_BATCH_DEADLINE 秒。
+    """
+    import re
+
+    # token 级缓存：同一批次的标题大量共享词汇，候选检索与打分按 (token, 分类, 词库版本) 复用
+    token_cache = TokenCache(req_categories, get_snapshot().version, shared=_TOKEN_LRU)
+
+    def _token_matches(tokens):
+        """返回 {token: (模糊候选 Top5, 最佳关键词)}，仅对缓存未命中的 token 检索与打分。"""
+        found, missing = token_cache.get_many(tokens)
+        if missing:
+            pool, pool_version = _versioned_candidate_pool(missing, req_categories)
+            # 候选来自其他版本词库（新索引构建中）时只在本请求内复用，不写入进程级 LRU
+            shared = pool_version == token_cache.version
+            for tk in missing:
+                entries = pool.get(tk, ())
+                value = (
+                    _score_fuzzy_candidates(tk, entries, req_categories),
+                    _score_best_keyword(tk, entries) if 'keyword' in req_categories else None,
+                )
+                token_cache.put(tk, value, shared=shared)
+                found[tk] = value
+        return found
+
+    def _extract_brands_with_deepseek(full_text: str):
+        return extract_brands(full_text, prompt='compact')
 
     def _smart_trim(text: str):
         t = (text or '').strip()
@@ -1417,73 +1147,59 @@ def clean_text_multi_batch(request):
             return t
         return t[:255].rstrip()
 
+    def _uniq_tokens(text: str):
+        # 分词
+        return sorted(set(t.lower() for t in re.split(r"[^A-Za-z0-9']+", text) if len(t) >= 2))
+
+    # 短路规则（core.short_circuit）先于分词与词库、LLM 阶段，每条文本只匹配一次
+    rules = get_short_circuit_rules()
+    live_texts = [t for t in texts if isinstance(t, str) and rules.match(t) is None]
+    live = set(live_texts)
+
+    # LLM 阶段先于逐条处理整体完成，请求经 core.llm_async 并发扇出，全部请求共用一个截止时刻：
+    if deadline is None:
+        deadline = llm_async.deadline_after()
+    # 品牌词：对未被短路的文本整体批量抽取（多条文本合并为一次请求）
+    brand_results = {}
+    if 'brand' in req_categories:
+        brand_results = extract_brands_many(live_texts, prompt='compact', deadline=deadline)
+
+    # 违禁词：全部文本的 token 与其分数 >= 0.6 的 forbidden 候选汇总去重后批量判断同义，每个 token 取第一个同义候选
+    all_tokens = sorted(set().union(*(_uniq_tokens(t) for t in live_texts))) if live_texts else []
+    all_matches = _token_matches(all_tokens)
+    forbidden_hits = first_synonym_hits({
+        tk: [phrase for phrase, cat, score in (all_matches[tk][0] or ()) if score >= 0.6 and cat in ('forbidden',)]
+        for tk in all_tokens
+    }, deadline=deadline)
+
     def _process_one(original_text: str) -> str:
         text = (original_text or '')
-        # 短路规则：若出现以下短语，则清洗结果为空字符串
-        lower = text.lower()
-        if (
-            'add to cart' in lower or
-            'customer reviews' in lower or
-            'price' in lower or
-            '— no data' in lower or  # 全角破折号
-            '- no data' in lower or  # 半角短横
-            'amazon' in lower
-        ):
+        # 命中短路规则（或非字符串）的文本清洗结果为空字符串
+        if not isinstance(text, str) or text not in live:
             return ''
-        # 价格模式：例如 "$14.99"、"$ 14. 99" 或仅 "$"
-        try:
-            if re.fullmatch(r"\s*\$\s*(?:[\d,]+(?:\s*\.\s*\d+)?\s*)?$", text):
-                return ''
-        except Exception:
-            pass
-        # 通用星级格式：如 "4.7 out of 5 stars"
-        try:
-            stars_pat = re.compile(r"\b\d+(?:\.\d+)?\s+out\s+of\s+\d+\s+stars\b", flags=re.IGNORECASE)
-            if stars_pat.search(text):
-                return ''
-        except Exception:
-            pass
-        # 数字型元素（仅数字、逗号、小数点），作为列表项时应去掉
-        try:
-            if re.fullmatch(r"\s*[\d,\.]+\s*", text):
-                return ''
-        except Exception:
-            pass
         cleaned = text
-        # 分词
-        tokens = [t.lower() for t in re.split(r"[^A-Za-z0-9']+", text) if len(t) >= 2]
-        uniq_tokens = sorted(set(tokens))
+        uniq_tokens = _uniq_tokens(text)
+        matches = _token_matches(uniq_tokens)
 
         # 删除违禁词（按词边界）
         removed_tokens = []
-        for tk in uniq_tokens:
-            candidates = _fuzzy_candidates(tk)
-            if not candidates:
-                continue
-            for phrase, cat, score in candidates:
-                if score < 0.6:
-                    continue
-                if cat in ('forbidden',) and _is_synonym(tk, phrase):
-                    pattern = re.compile(rf"\b{re.escape(tk)}\b", flags=re.IGNORECASE)
-                    if pattern.search(cleaned):
-                        cleaned = pattern.sub('', cleaned)
-                        removed_tokens.append(tk)
-                    break
+        synonym_hits = [tk for tk in uniq_tokens if forbidden_hits.get(tk)]
+        if synonym_hits:
+            cleaned, spans = get_boundary_matcher(synonym_hits).remove(cleaned)
+            removed_tokens = sorted({phrase for _, _, phrase in spans})
 
         # 品牌词统一抽取并删除
         if 'brand' in req_categories:
-            brands = _extract_brands_with_deepseek(text)
+            brands = brand_results.get(text)
+            if brands is None:
+                brands = _extract_brands_with_deepseek(text)
             if brands:
-                phrases = sorted(set(b for b in brands if b), key=lambda s: (-len(s.strip()), s.lower()))
-                for p in phrases:
-                    pattern = re.compile(rf"\b{re.escape(p)}\b", flags=re.IGNORECASE)
-                    if pattern.search(cleaned):
-                        cleaned = pattern.sub('', cleaned)
+                cleaned, _ = get_boundary_matcher(brands).remove(cleaned)
 
         # 关键词追加（若允许）
         if 'keyword' in req_categories:
             for tk in [t for t in uniq_tokens if t not in set(removed_tokens)]:
-                m = _best_keyword_for_token(tk)
+                m = matches[tk][1]
                 if not m:
                     continue
                 best_phrase = m[0]
@@ -1491,34 +1207,218 @@ def clean_text_multi_batch(request):
                     cleaned = (cleaned.rstrip() + (' ' if cleaned and not cleaned.endswith(' ') else '') + best_phrase)
 
         # hotwords 全局追加
-        if hotwords_global:
-            for w in [x for x in hotwords_global.split(' ') if x.strip()]:
-                if not re.search(rf"\b{re.escape(w)}\b", cleaned, flags=re.IGNORECASE):
+        if hotword_list:
+            present = {w.lower() for w in get_boundary_matcher(hotword_list).found(cleaned)}
+            for w in hotword_list:
+                if w.lower() not in present:
                     cleaned = (cleaned.rstrip() + (' ' if cleaned and not cleaned.endswith(' ') else '') + w)
+                    present.add(w.lower())
 
         # 统一处理 amazon 文本
         cleaned = cleaned.replace('amazon', '').replace('AMAZON', '').replace('Amazon', '')
         cleaned = _smart_trim(cleaned)
         return cleaned
 
+    return _process_one, token_cache
+
+
+@csrf_exempt
+def clean_text_multi_batch(request):
+    """
+    POST /api/words/clean_multi/batch
+    body: {
+      "texts": ["...", "..."],
+      "categories": ["forbidden","brand","keyword"],
+      "hotwords": "",  # 可选，若非空则不追加 keyword 类别
+      "meta": false,   # 可选，为 true 时在 data.meta 中返回去重统计
+      "stream": false  # 可选，为 true（或请求头 Accept: application/x-ndjson）时以 NDJSON 流式返回
+    }
+    返回：{code, msg, data: {result: {原text: 修改后的text}}}
+    若修改后为空字符串则返回空字符串。
+    流式返回：每条文本处理完成即输出一行 {"index", "original", "cleaned"}（按完成顺序，index 为输入下标），
+    最后一行为 {"summary": {"texts", "unique_texts", "dedup_ratio", "elapsed_ms"}}。
+    """
+    if request.method != 'POST':
+        return JsonResponse({'code': 405, 'msg': 'Method Not Allowed'})
+
+    data = parse_json(request)
+    texts = data.get('texts') or data.get('text_list') or []
+    if not isinstance(texts, list) or len(texts) == 0:
+        return JsonResponse({'code': 400, 'msg': 'texts必须为非空列表'})
+
+    req_categories, hotword_list = _batch_options(data)
+    dedup_keys, distinct = _dedup_texts(texts)
+    unique_texts = list(distinct.values())
+
     from collections import OrderedDict
-    results = [None] * len(texts)
-    max_workers = min(4, len(texts))
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futures = {ex.submit(_process_one, texts[i]): i for i in range(len(texts))}
-        for fut in as_completed(futures):
-            idx = futures[fut]
-            try:
-                cleaned = fut.result() or ''
-            except Exception:
-                cleaned = ''
-            results[idx] = cleaned
+    # 进程级常驻线程池执行，单个请求同时占用的工作线程数受 BATCH_REQUEST_PARALLELISM 限制
+    pool = get_batch_pool()
+    parallelism = getattr(settings, 'BATCH_REQUEST_PARALLELISM', 4)
+    token_caches = []
+
+    def _summary():
+        metrics.incr('batch.token_cache.hits', sum(c.hits for c in token_caches))
+        metrics.incr('batch.token_cache.misses', sum(c.misses for c in token_caches))
+        metrics.incr('batch.texts', len(texts))
+        metrics.incr('batch.unique_texts', len(unique_texts))
+        return {
+            'texts': len(texts),
+            'unique_texts': len(unique_texts),
+            'dedup_ratio': round(1 - len(unique_texts) / len(texts), 4),
+        }
+
+    stream = data.get('stream') or request.GET.get('stream')
+    if str(stream).lower() in ('1', 'true') or 'application/x-ndjson' in request.META.get('HTTP_ACCEPT', ''):
+        indexes_by_key = {}
+        for i, key in enumerate(dedup_keys):
+            indexes_by_key.setdefault(key, []).append(i)
+        keys = list(distinct)
+        # 流式模式按块执行整条管线（含 LLM 阶段），首批结果只需等待第一块的 LLM 调用，与批量大小无关
+        chunk_size = max(1, int(getattr(settings, 'BATCH_STREAM_CHUNK_SIZE', 8)))
+        chunks = [range(s, min(s + chunk_size, len(unique_texts))) for s in range(0, len(unique_texts), chunk_size)]
+
+        def _clean_chunk(chunk):
+            chunk_texts = [unique_texts[u] for u in chunk]
+            # 截止时刻按块在开始执行时计算：共用整条流的截止时刻会让靠后的块开始时已超时、静默跳过 LLM
+            deadline = llm_async.deadline_after()
+            process_one, token_cache = _build_batch_cleaner(chunk_texts, req_categories, hotword_list, deadline)
+            token_caches.append(token_cache)
+            cleaned = []
+            for t in chunk_texts:
+                try:
+                    cleaned.append(process_one(t))
+                except Exception:
+                    logger.warning('批量清洗单条失败', exc_info=True)
+                    cleaned.append(None)
+            return cleaned
+
+        def _lines():
+            started = time.monotonic()
+            for c, cleaned_list in pool.imap(_clean_chunk, chunks, limit=parallelism):
+                for u, cleaned in zip(chunks[c], cleaned_list or [None] * len(chunks[c])):
+                    for i in indexes_by_key[keys[u]]:
+                        yield json.dumps(
+                            {'index': i, 'original': texts[i], 'cleaned': cleaned or ''}, ensure_ascii=False,
+                        ) + '\n'
+            summary = _summary()
+            summary['elapsed_ms'] = round((time.monotonic() - started) * 1000, 1)
+            yield json.dumps({'summary': summary}, ensure_ascii=False) + '\n'
+
+        response = StreamingHttpResponse(_lines(), content_type='application/x-ndjson')
+        # 关闭反向代理缓冲，逐行下发
+        response['X-Accel-Buffering'] = 'no'
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    _process_one, token_cache = _build_batch_cleaner(unique_texts, req_categories, hotword_list)
+    token_caches.append(token_cache)
+    results = pool.map(_process_one, unique_texts, limit=parallelism)
+    cleaned_by_key = dict(zip(distinct, results))
 
     result_map = OrderedDict()
-    for i, t in enumerate(texts):
-        result_map[t] = results[i] or ''
+    for key, t in zip(dedup_keys, texts):
+        result_map[t] = cleaned_by_key[key] or ''
 
-    return JsonResponse({'code': 0, 'msg': 'ok', 'data': {'result': result_map}})
+    summary = _summary()
+    resp_data = {'result': result_map}
+    if data.get('meta'):
+        resp_data['meta'] = summary
+    return JsonResponse({'code': 0, 'msg': 'ok', 'data': resp_data})
+
+
+@csrf_exempt
+def clean_jobs(request):
+    """
+    POST /api/words/clean_multi/jobs
+    body: {"texts": [...], "categories": [...], "hotwords": ""}（参数同 clean_multi/batch）
+    提交后台清洗任务（由 manage.py clean_worker 执行），返回 {code, msg, data: {job_id, status, total}}。
+    """
+    if request.method != 'POST':
+        return JsonResponse({'code': 405, 'msg': 'Method Not Allowed'})
+    data = parse_json(request)
+    texts = data.get('texts') or data.get('text_list') or []
+    if not isinstance(texts, list) or len(texts) == 0:
+        return JsonResponse({'code': 400, 'msg': 'texts必须为非空列表'})
+    max_texts = int(getattr(settings, 'CLEAN_JOB_MAX_TEXTS', 200000))
+    if len(texts) > max_texts:
+        return JsonResponse({'code': 400, 'msg': f'texts最多{max_texts}条'})
+    categories = data.get('categories')
+    if categories is not None and not isinstance(categories, list):
+        return JsonResponse({'code': 400, 'msg': 'categories必须为列表'})
+    job = submit_job(texts, categories, str(data.get('hotwords', '') or '').strip())
+    return JsonResponse({'code': 0, 'msg': 'ok', 'data': {'job_id': job.pk, 'status': job.status, 'total': job.total}})
+
+
+def _job_payload(job):
+    fmt = lambda dt: dt.strftime('%Y-%m-%d %H:%M:%S') if dt else None
+    return {
+        'job_id': job.pk,
+        'status': job.status,
+        **job_progress(job),
+        'created_at': fmt(job.created_at),
+        'started_at': fmt(job.started_at),
+        'finished_at': fmt(job.finished_at),
+        'attempts': job.attempts,
+        'error': job.error,
+    }
+
+
+def clean_job_status(request, job_id):
+    """
+    GET /api/words/clean_multi/jobs/<job_id>
+    返回任务状态、进度（processed/total/percent）、吞吐（条/秒）与预计剩余时间。
+    """
+    job = CleanJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'code': 404, 'msg': '任务不存在'})
+    return JsonResponse({'code': 0, 'msg': 'ok', 'data': _job_payload(job)})
+
+
+def clean_job_results(request, job_id):
+    """
+    GET /api/words/clean_multi/jobs/<job_id>/results?offset=0&limit=1000
+    按输入下标分页返回已完成的结果 [{index, original, cleaned}]；next_offset 为 null 表示已取完：
+    任务已结束（done 或 failed）且已处理的条目均已返回。失败任务只返回检查点之前的结果，status 为 failed。
+    """
+    job = CleanJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return JsonResponse({'code': 404, 'msg': '任务不存在'})
+    try:
+        offset = max(0, int(request.GET.get('offset', 0)))
+        limit = min(max(1, int(request.GET.get('limit', 1000))), 5000)
+    except ValueError:
+        return JsonResponse({'code': 400, 'msg': 'offset/limit必须为整数'})
+    # 只返回检查点之前的条目：检查点之后的结果可能属于尚未提交的块
+    end = min(offset + limit, job.processed)
+    items = [
+        {'index': index, 'original': original, 'cleaned': cleaned or ''}
+        for index, original, cleaned in CleanJobItem.objects.filter(
+            job_id=job.pk, index__gte=offset, index__lt=end,
+        ).order_by('index').values_list('index', 'original', 'cleaned')
+    ]
+    next_offset = max(offset, end)
+    # 已结束的任务不会再有新结果：取完已处理的条目即结束（失败任务的 processed 可能小于 total）
+    if next_offset >= job.total or (job.status in ('done', 'failed') and next_offset >= job.processed):
+        next_offset = None
+    return JsonResponse({'code': 0, 'msg': 'ok', 'data': {
+        'job_id': job.pk,
+        'status': job.status,
+        'processed': job.processed,
+        'total': job.total,
+        'offset': offset,
+        'next_offset': next_offset,
+        'items': items,
+    }})
+
+
+def metrics_view(request):
+    """
+    GET /api/metrics
+    进程内运行指标（缓存命中率等），仅管理员可见。
+    """
+    if not (request.user.is_authenticated and request.user.is_staff):
+        return JsonResponse({'code': 403, 'msg': '无权访问'})
+    return JsonResponse({'code': 0, 'msg': 'ok', 'data': metrics.snapshot()})
 
 
 @csrf_exempt
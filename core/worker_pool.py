@@ -0,0 +1,169 @@
+"""
+批量清洗共用的进程级工作线程池
+
+所有批量请求共享一组常驻工作线程（BATCH_POOL_WORKERS），不再每个请求新建、销毁线程池：
+  - 每个任务前后调用 close_old_connections()，按 CONN_MAX_AGE 复用或关闭工作线程的数据库连接，
+    不会因线程常驻而留下失效连接；
+  - map()/imap() 以滑动窗口提交任务，单个请求同时占用的工作线程数不超过 limit（BATCH_REQUEST_PARALLELISM），
+    大批量请求不会占满线程池、饿死其他请求；
+  - 排队任务数与忙碌线程占比写入 batch_pool.* 仪表值，便于按 CPU 核数调整池大小。
+fork 后子进程丢弃继承的线程池，首次使用时重建。
+"""
+import logging
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from django.db import close_old_connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class WorkerPool:
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self._executor = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._busy = 0
+        self.completed = 0
+        self.failed = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix=f'{self.name}-worker',
+                    )
+        return self._executor
+
+    def _publish(self):
+        # 调用方持有 self._lock
+        metrics.set_gauge(f'{self.name}.queue_depth', self._queued)
+        metrics.set_gauge(f'{self.name}.busy_workers', self._busy)
+        metrics.set_gauge(f'{self.name}.utilization', round(self._busy / self.max_workers, 3))
+
+    def _run(self, fn, args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._busy += 1
+            self._publish()
+        ok = False
+        try:
+            close_old_connections()
+            result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            close_old_connections()
+            with self._lock:
+                self._busy -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._publish()
+
+    def submit(self, fn, *args, **kwargs):
+        executor = self._get_executor()
+        with self._lock:
+            self._queued += 1
+            self._publish()
+        try:
+            return executor.submit(self._run, fn, args, kwargs)
+        except BaseException:
+            with self._lock:
+                self._queued -= 1
+                self._publish()
+            raise
+
+    def imap(self, fn, items, limit=None):
+        """
+        对 items 逐项执行 fn，按完成顺序产出 (下标, 结果)（抛出异常的项结果为 None）。
+        同时在途的任务数不超过 limit；迭代被提前关闭时取消尚未开始的任务。
+        """
+        items = list(items)
+        if not items:
+            return
+        limit = max(1, min(int(limit or self.max_workers), len(items)))
+        todo = iter(enumerate(items))
+        pending = {}
+
+        def submit_next():
+            for i, item in todo:
+                pending[self.submit(fn, item)] = i
+                return
+
+        for _ in range(limit):
+            submit_next()
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    i = pending.pop(fut)
+                    try:
+                        result = fut.result()
+                    except Exception:
+                        logger.warning('%s 任务失败', self.name, exc_info=True)
+                        result = None
+                    submit_next()
+                    yield i, result
+        finally:
+            cancelled = sum(1 for fut in pending if fut.cancel())
+            if cancelled:
+                with self._lock:
+                    self._queued -= cancelled
+                    self._publish()
+
+    def map(self, fn, items, limit=None):
+        """imap 的收集版本：返回与 items 顺序一致的结果列表。"""
+        items = list(items)
+        results = [None] * len(items)
+        for i, result in self.imap(fn, items, limit):
+            results[i] = result
+        return results
+
+    def reset(self):
+        """丢弃线程池（fork 后在子进程中调用），下次提交时重建。"""
+        with self._lock:
+            self._executor = None
+            self._queued = 0
+            self._busy = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'max_workers': self.max_workers,
+                'queue_depth': self._queued,
+                'busy_workers': self._busy,
+                'utilization': round(self._busy / self.max_workers, 3),
+                'completed': self.completed,
+                'failed': self.failed,
+            }
+
+
+_POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_batch_pool() -> WorkerPool:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                from django.conf import settings
+                _POOL = WorkerPool('batch_pool', getattr(settings, 'BATCH_POOL_WORKERS', 8))
+    return _POOL
+
+
+def _after_fork():
+    if _POOL is not None:
+        _POOL.reset()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
@@ -1,4 +1,5 @@
 import os
+import json
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -92,4 +93,82 @@ DOMAIN_NAME = os.getenv('DOMAIN_NAME', 'http://localhost:8000')
 # Session settings for long-lived login
 SESSION_COOKIE_AGE = int(os.getenv('SESSION_COOKIE_AGE', str(60 * 60 * 24 * 90)))  # 90 天
 SESSION_SAVE_EVERY_REQUEST = True  # 每次请求刷新过期时间
-SESSION_EXPIRE_AT_BROWSER_CLOSE = False  # 关闭浏览器不退出登录
\ No newline at end of file
+SESSION_EXPIRE_AT_BROWSER_CLOSE = False  # 关闭浏览器不退出登录
+# 词库匹配：automaton（预编译多模式自动机，默认）/ reference（逐词正则替换，用于比对）
+LEXICON_MATCHER = os.getenv('LEXICON_MATCHER', 'automaton')
+# 词库快照：两次检查数据库版本号的最小间隔（秒）
+LEXICON_VERSION_CHECK_SECONDS = float(os.getenv('LEXICON_VERSION_CHECK_SECONDS', '1'))
+
+# WordLog 命中记录缓冲写入：条数阈值、时间阈值（秒）、采样率（0~1）
+WORDLOG_BUFFER_SIZE = int(os.getenv('WORDLOG_BUFFER_SIZE', '200'))
+WORDLOG_FLUSH_SECONDS = float(os.getenv('WORDLOG_FLUSH_SECONDS', '2'))
+WORDLOG_SAMPLE_RATE = float(os.getenv('WORDLOG_SAMPLE_RATE', '1'))
+# 模糊候选检索：fts（SQLite FTS5 trigram 索引，默认）/ trigram（内存 trigram 倒排索引）/ snapshot（扫描内存词库快照）
+LEXICON_CANDIDATES = os.getenv('LEXICON_CANDIDATES', 'fts')
+# 内存 trigram 索引：每个 token 每个分类取回的候选数、posting 总数上限（约 4 字节/条）、
+# 单个 trigram 的文档频率上限（超过视为停用 trigram）、查询提前结束所需的最小重合比例（占 token trigram 数）
+TRIGRAM_TOP_K = int(os.getenv('TRIGRAM_TOP_K', '100'))
+TRIGRAM_INDEX_MAX_POSTINGS = int(os.getenv('TRIGRAM_INDEX_MAX_POSTINGS', '20000000'))
+TRIGRAM_MAX_DF = int(os.getenv('TRIGRAM_MAX_DF', '10000'))
+TRIGRAM_MIN_OVERLAP = float(os.getenv('TRIGRAM_MIN_OVERLAP', '0.5'))
+# 相似度内核：lcs（位并行 LCS，默认）/ difflib（SequenceMatcher，用于比对）
+SIMILARITY_KERNEL = os.getenv('SIMILARITY_KERNEL', 'lcs')
+# 批量清洗 token 结果的进程级 LRU 容量（0 关闭，仅保留请求内缓存）
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '50000'))
+# DeepSeek 同义判断结果缓存：进程内 LRU 容量、有效期（秒，内存与数据库表 core_synonymverdict 共用）
+SYNONYM_CACHE_SIZE = int(os.getenv('SYNONYM_CACHE_SIZE', '50000'))
+SYNONYM_CACHE_TTL = float(os.getenv('SYNONYM_CACHE_TTL', str(30 * 86400)))
+# 批量同义判断：每次请求最多包含的词对数、单次请求超时（秒）
+SYNONYM_BATCH_MAX_PAIRS = int(os.getenv('SYNONYM_BATCH_MAX_PAIRS', '50'))
+SYNONYM_BATCH_TIMEOUT = float(os.getenv('SYNONYM_BATCH_TIMEOUT', '20'))
+# DeepSeek 品牌词抽取结果缓存（按规范化文本哈希 + 提示词版本）：进程内 LRU 容量、有效期（秒）
+BRAND_CACHE_SIZE = int(os.getenv('BRAND_CACHE_SIZE', '20000'))
+BRAND_CACHE_TTL = float(os.getenv('BRAND_CACHE_TTL', str(30 * 86400)))
+# 批量清洗的品牌词抽取：每次请求的输入 token 预算（估算值，0 关闭合并、逐条调用）、每次请求最多文本数、请求超时（秒）
+BRAND_BATCH_TOKEN_BUDGET = int(os.getenv('BRAND_BATCH_TOKEN_BUDGET', '2000'))
+BRAND_BATCH_MAX_ITEMS = int(os.getenv('BRAND_BATCH_MAX_ITEMS', '50'))
+BRAND_BATCH_TIMEOUT = float(os.getenv('BRAND_BATCH_TIMEOUT', '30'))
+# DeepSeek 出站 HTTP 连接池：池大小（应不小于并发工作线程数）、重试次数、退避系数（秒）、连接超时（秒）
+DEEPSEEK_HTTP_POOL_SIZE = int(os.getenv('DEEPSEEK_HTTP_POOL_SIZE', '16'))
+DEEPSEEK_HTTP_RETRIES = int(os.getenv('DEEPSEEK_HTTP_RETRIES', '2'))
+DEEPSEEK_HTTP_BACKOFF = float(os.getenv('DEEPSEEK_HTTP_BACKOFF', '0.3'))
+DEEPSEEK_CONNECT_TIMEOUT = float(os.getenv('DEEPSEEK_CONNECT_TIMEOUT', '3.05'))
+# 批量清洗 LLM 阶段的 asyncio 并发扇出（需 httpx，不可用时退化为线程池）：
+# 开关、进程内同时在途请求上限、单次批量请求的并发上限、单次批量请求 LLM 阶段的总截止时间（秒）
+LLM_ASYNC_ENABLED = os.getenv('LLM_ASYNC_ENABLED', '1') == '1'
+LLM_GLOBAL_CONCURRENCY = int(os.getenv('LLM_GLOBAL_CONCURRENCY', '64'))
+LLM_REQUEST_CONCURRENCY = int(os.getenv('LLM_REQUEST_CONCURRENCY', '32'))
+LLM_BATCH_DEADLINE = float(os.getenv('LLM_BATCH_DEADLINE', '60'))
+# 相同 LLM 请求合并：是否启用跨进程模式（经 core_llminflight 锁行）、锁租期（秒，超时后等待方接管）
+LLM_SINGLE_FLIGHT_CROSS_PROCESS = os.getenv('LLM_SINGLE_FLIGHT_CROSS_PROCESS', '0') == '1'
+LLM_SINGLE_FLIGHT_LEASE = float(os.getenv('LLM_SINGLE_FLIGHT_LEASE', '30'))
+# DeepSeek 熔断器：滑动窗口调用数、判定所需最少调用数、失败率阈值、打开后冷却时间（秒）、半开试探调用数、
+# 慢调用判定（耗时超过名义超时的比例）
+DEEPSEEK_BREAKER_WINDOW = int(os.getenv('DEEPSEEK_BREAKER_WINDOW', '50'))
+DEEPSEEK_BREAKER_MIN_CALLS = int(os.getenv('DEEPSEEK_BREAKER_MIN_CALLS', '10'))
+DEEPSEEK_BREAKER_ERROR_RATE = float(os.getenv('DEEPSEEK_BREAKER_ERROR_RATE', '0.5'))
+DEEPSEEK_BREAKER_OPEN_SECONDS = float(os.getenv('DEEPSEEK_BREAKER_OPEN_SECONDS', '30'))
+DEEPSEEK_BREAKER_HALF_OPEN_CALLS = int(os.getenv('DEEPSEEK_BREAKER_HALF_OPEN_CALLS', '1'))
+DEEPSEEK_SLOW_CALL_RATIO = float(os.getenv('DEEPSEEK_SLOW_CALL_RATIO', '0.8'))
+# 自适应超时：实际超时 = 成功调用耗时 p95 × 系数，下限（秒），上限为各调用点的名义超时
+DEEPSEEK_TIMEOUT_P95_FACTOR = float(os.getenv('DEEPSEEK_TIMEOUT_P95_FACTOR', '3'))
+DEEPSEEK_MIN_TIMEOUT = float(os.getenv('DEEPSEEK_MIN_TIMEOUT', '1.5'))
+# DeepSeek 接口根地址（OpenAI 兼容），离线压测时可指向 manage.py deepseek_stub 启动的本地服务
+DEEPSEEK_BASE_URL = os.getenv('DEEPSEEK_BASE_URL', 'https://api.deepseek.com')
+# 品牌词抽取前的本地预判：开关、送 LLM 的品牌可能性分数阈值（0~1，低于阈值的文本视为无品牌词）
+BRAND_PREFILTER_ENABLED = os.getenv('BRAND_PREFILTER_ENABLED', '1') == '1'
+BRAND_PREFILTER_THRESHOLD = float(os.getenv('BRAND_PREFILTER_THRESHOLD', '0.45'))
+# 批量清洗的进程级常驻线程池：工作线程数（默认 CPU 核数 × 2）、单个请求同时占用的线程数上限
+BATCH_POOL_WORKERS = int(os.getenv('BATCH_POOL_WORKERS', str(max(4, (os.cpu_count() or 1) * 2))))
+BATCH_REQUEST_PARALLELISM = int(os.getenv('BATCH_REQUEST_PARALLELISM', '4'))
+# 批量清洗流式模式（NDJSON）每块条数：每块单独完成 LLM 阶段后立即输出，越小首条结果越快、LLM 请求合并越少
+BATCH_STREAM_CHUNK_SIZE = int(os.getenv('BATCH_STREAM_CHUNK_SIZE', '8'))
+# 大批量清洗后台任务（manage.py clean_worker 执行）：单任务最多条数、每块条数（检查点粒度）、每块并发线程数、
+# 心跳超时（秒，超过后其他工作进程可接管该任务）、未推进检查点的连续失败次数上限（之前放回队列从检查点重试）
+CLEAN_JOB_MAX_TEXTS = int(os.getenv('CLEAN_JOB_MAX_TEXTS', '200000'))
+CLEAN_JOB_CHUNK_SIZE = int(os.getenv('CLEAN_JOB_CHUNK_SIZE', '500'))
+CLEAN_JOB_PARALLELISM = int(os.getenv('CLEAN_JOB_PARALLELISM', str(BATCH_POOL_WORKERS)))
+CLEAN_JOB_LEASE_SECONDS = float(os.getenv('CLEAN_JOB_LEASE_SECONDS', '300'))
+CLEAN_JOB_MAX_ATTEMPTS = int(os.getenv('CLEAN_JOB_MAX_ATTEMPTS', '3'))
+# 批量清洗短路规则表（JSON 数组，每项 [名称, contains|fullmatch|search, 模式, 可选提示词]），为空时使用 core.short_circuit.DEFAULT_RULES
+BATCH_SHORT_CIRCUIT_RULES = json.loads(os.getenv('BATCH_SHORT_CIRCUIT_RULES') or 'null')